@@ -9,9 +9,10 @@ import sys
 import json
 import uuid
 import logging
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Sequence
 from dataclasses import dataclass, asdict
 from enum import Enum
 
@@ -97,8 +98,91 @@ class MeetingMinutes:
             self.created_at = datetime.now().isoformat()
 
 class DatabaseManager:
+    # An in-memory database is never persisted, so journaling and fsyncs buy nothing
+    MEMORY_PRAGMAS = (
+        "journal_mode=MEMORY",
+        "synchronous=OFF",
+        "temp_store=MEMORY",
+        "locking_mode=EXCLUSIVE",
+        "cache_size=-64000",
+    )
+    
+    # Tables that hang off a meeting; deleting the meeting removes their rows.
+    # {table} lets a table from an older schema be rebuilt under a temporary name.
+    CHILD_TABLES = {
+        "transcriptions": '''
+            CREATE TABLE IF NOT EXISTS {table} (
+                id TEXT PRIMARY KEY,
+                meeting_id TEXT NOT NULL,
+                text TEXT NOT NULL,
+                language TEXT NOT NULL,
+                duration REAL NOT NULL,
+                segments JSON NOT NULL,
+                created_at TEXT NOT NULL,
+                FOREIGN KEY (meeting_id) REFERENCES meetings (id) ON DELETE CASCADE
+            )
+        ''',
+        "meeting_minutes": '''
+            CREATE TABLE IF NOT EXISTS {table} (
+                id TEXT PRIMARY KEY,
+                meeting_id TEXT NOT NULL,
+                transcription_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                artifacts TEXT NOT NULL,
+                sprint_info TEXT NOT NULL,
+                speakers TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                FOREIGN KEY (meeting_id) REFERENCES meetings (id) ON DELETE CASCADE,
+                FOREIGN KEY (transcription_id) REFERENCES transcriptions (id) ON DELETE CASCADE
+            )
+        ''',
+    }
+    
+    # Whole schema as one script, so it is parsed and run in a single call
+    SCHEMA_DDL = '''
+            CREATE TABLE IF NOT EXISTS meetings (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                date TEXT NOT NULL,
+                status TEXT NOT NULL,
+                video_path TEXT,
+                language TEXT,
+                participants TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                processing_step TEXT,
+                error_message TEXT
+            );
+    ''' + "".join(f"{ddl.format(table=table)};\n" for table, ddl in CHILD_TABLES.items()) + '''
+            -- Indexes for the status-filtered listing and per-meeting lookups/deletes
+            CREATE INDEX IF NOT EXISTS idx_meetings_status_created ON meetings (status, created_at DESC);
+            CREATE INDEX IF NOT EXISTS idx_trans_meeting ON transcriptions (meeting_id);
+            CREATE INDEX IF NOT EXISTS idx_minutes_meeting ON meeting_minutes (meeting_id);
+    '''
+    
+    # Inserts shared by the single-row, bulk and seed paths
+    INSERT_MEETING = '''
+        INSERT INTO meetings (id, title, date, status, video_path, language,
+                            participants, created_at, updated_at, processing_step, error_message)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    INSERT_TRANSCRIPTION = '''
+        INSERT INTO transcriptions (id, meeting_id, text, language, duration, segments, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''
+    INSERT_MEETING_MINUTES = '''
+        INSERT INTO meeting_minutes (id, meeting_id, transcription_id, title,
+                                   summary, artifacts, sprint_info, speakers, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
     def __init__(self, db_path: str = "meetings.db"):
         self.db_path = db_path
+        self.conn = None
+        # One connection for the manager's lifetime (an in-memory database only lives as long
+        # as its connection); Flask handler threads share it under this lock
+        self._lock = threading.RLock()
         self.init_database()
     
     def init_database(self):
@@ -108,87 +192,103 @@ class DatabaseManager:
             return
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Create meetings table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS meetings (
-                        id TEXT PRIMARY KEY,
-                        title TEXT NOT NULL,
-                        date TEXT NOT NULL,
-                        status TEXT NOT NULL,
-                        video_path TEXT,
-                        language TEXT,
-                        participants TEXT,
-                        created_at TEXT NOT NULL,
-                        updated_at TEXT NOT NULL,
-                        processing_step TEXT,
-                        error_message TEXT
-                    )
-                ''')
-                
-                # Create transcriptions table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS transcriptions (
-                        id TEXT PRIMARY KEY,
-                        meeting_id TEXT NOT NULL,
-                        text TEXT NOT NULL,
-                        language TEXT NOT NULL,
-                        duration REAL NOT NULL,
-                        segments TEXT NOT NULL,
-                        created_at TEXT NOT NULL,
-                        FOREIGN KEY (meeting_id) REFERENCES meetings (id)
-                    )
-                ''')
-                
-                # Create meeting_minutes table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS meeting_minutes (
-                        id TEXT PRIMARY KEY,
-                        meeting_id TEXT NOT NULL,
-                        transcription_id TEXT NOT NULL,
-                        title TEXT NOT NULL,
-                        summary TEXT NOT NULL,
-                        artifacts TEXT NOT NULL,
-                        sprint_info TEXT NOT NULL,
-                        speakers TEXT NOT NULL,
-                        created_at TEXT NOT NULL,
-                        FOREIGN KEY (meeting_id) REFERENCES meetings (id),
-                        FOREIGN KEY (transcription_id) REFERENCES transcriptions (id)
-                    )
-                ''')
-                
-                conn.commit()
-                logger.info("Database initialized successfully")
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            # PRAGMAs go before BEGIN: journal_mode cannot change inside a transaction
+            pragmas = ""
+            if self.db_path == ":memory:":
+                pragmas = "".join(f"PRAGMA {pragma};\n" for pragma in self.MEMORY_PRAGMAS)
+            with self._lock:
+                self.conn.executescript(f"{pragmas}BEGIN;\n{self.SCHEMA_DDL}COMMIT;\n")
+                if self._upgrade_foreign_keys():
+                    # Dropping the old tables dropped their indexes too
+                    self.conn.executescript(self.SCHEMA_DDL)
+                # Outside the schema transaction: SQLite ignores this PRAGMA inside one
+                self.conn.execute("PRAGMA foreign_keys = ON")
+            logger.info("Database initialized successfully")
                 
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
     
+    def _upgrade_foreign_keys(self) -> bool:
+        """Rebuild child tables created before their foreign keys cascaded on delete."""
+        rebuilt = False
+        with self.conn as conn:
+            for table, ddl in self.CHILD_TABLES.items():
+                actions = {row[6] for row in conn.execute(f'PRAGMA foreign_key_list({table})')}
+                if actions == {'CASCADE'}:
+                    continue
+                logger.info(f"Rebuilding {table} table with cascading foreign keys")
+                conn.execute(ddl.format(table=f'{table}_new'))
+                conn.execute(f'INSERT INTO {table}_new SELECT * FROM {table}')
+                conn.execute(f'DROP TABLE {table}')
+                conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+                rebuilt = True
+        return rebuilt
+    
+    @staticmethod
+    def _meeting_row(meeting: Meeting) -> tuple:
+        """Bind parameters for INSERT_MEETING."""
+        return (
+            meeting.id, meeting.title, meeting.date, meeting.status,
+            meeting.video_path, meeting.language, json.dumps(meeting.participants),
+            meeting.created_at, meeting.updated_at, meeting.processing_step, meeting.error_message
+        )
+    
+    @staticmethod
+    def _transcription_row(transcription: Transcription) -> tuple:
+        """Bind parameters for INSERT_TRANSCRIPTION."""
+        return (
+            transcription.id, transcription.meeting_id, transcription.text,
+            transcription.language, transcription.duration,
+            json.dumps(transcription.segments, separators=(',', ':')),
+            transcription.created_at
+        )
+    
+    @staticmethod
+    def _meeting_minutes_row(minutes: MeetingMinutes) -> tuple:
+        """Bind parameters for INSERT_MEETING_MINUTES."""
+        return (
+            minutes.id, minutes.meeting_id, minutes.transcription_id, minutes.title,
+            minutes.summary, json.dumps(minutes.artifacts), json.dumps(minutes.sprint_info),
+            json.dumps(minutes.speakers), minutes.created_at
+        )
+    
     def create_meeting(self, meeting: Meeting) -> Meeting:
         """Create a new meeting record."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO meetings (id, title, date, status, video_path, language, 
-                                        participants, created_at, updated_at, processing_step, error_message)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    meeting.id, meeting.title, meeting.date, meeting.status,
-                    meeting.video_path, meeting.language, json.dumps(meeting.participants),
-                    meeting.created_at, meeting.updated_at, meeting.processing_step, meeting.error_message
-                ))
-                conn.commit()
+            with self._lock, self.conn as conn:
+                conn.execute(self.INSERT_MEETING, self._meeting_row(meeting))
                 return meeting
         except Exception as e:
             logger.error(f"Failed to create meeting: {e}")
             raise
     
+    def create_meetings_bulk(self, meetings: List[Meeting]) -> List[Meeting]:
+        """Create several meeting records in one transaction."""
+        try:
+            with self._lock, self.conn as conn:
+                conn.executemany(self.INSERT_MEETING, [self._meeting_row(meeting) for meeting in meetings])
+                return meetings
+        except Exception as e:
+            logger.error(f"Failed to create meetings: {e}")
+            raise
+    
+    def seed(self, meetings: Sequence[Meeting] = (), transcriptions: Sequence[Transcription] = (),
+             minutes: Sequence[MeetingMinutes] = ()):
+        """Insert meetings, transcriptions and minutes in a single transaction (tests, fixtures)."""
+        try:
+            with self._lock, self.conn as conn:
+                conn.executemany(self.INSERT_MEETING, [self._meeting_row(m) for m in meetings])
+                conn.executemany(self.INSERT_TRANSCRIPTION, [self._transcription_row(t) for t in transcriptions])
+                conn.executemany(self.INSERT_MEETING_MINUTES, [self._meeting_minutes_row(m) for m in minutes])
+        except Exception as e:
+            logger.error(f"Failed to seed database: {e}")
+            raise
+    
     def get_meeting(self, meeting_id: str) -> Optional[Meeting]:
         """Get a meeting by ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self.conn as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT * FROM meetings WHERE id = ?', (meeting_id,))
                 row = cursor.fetchone()
@@ -206,10 +306,32 @@ class DatabaseManager:
             logger.error(f"Failed to get meeting: {e}")
             return None
     
+    def _exists(self, table: str, record_id: str) -> bool:
+        """Check whether a row with this ID exists without loading it."""
+        try:
+            with self._lock:
+                row = self.conn.execute(f'SELECT EXISTS(SELECT 1 FROM {table} WHERE id = ?)', (record_id,)).fetchone()
+            return bool(row[0])
+        except Exception as e:
+            logger.error(f"Failed to check {table} record: {e}")
+            raise
+    
+    def exists_meeting(self, meeting_id: str) -> bool:
+        """Check whether a meeting exists."""
+        return self._exists('meetings', meeting_id)
+    
+    def exists_transcription(self, transcription_id: str) -> bool:
+        """Check whether a transcription exists."""
+        return self._exists('transcriptions', transcription_id)
+    
+    def exists_meeting_minutes(self, minutes_id: str) -> bool:
+        """Check whether meeting minutes exist."""
+        return self._exists('meeting_minutes', minutes_id)
+    
     def get_meetings(self, limit: int = 50, offset: int = 0, status: Optional[str] = None) -> List[Meeting]:
         """Get meetings with optional filtering."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self.conn as conn:
                 cursor = conn.cursor()
                 
                 query = 'SELECT * FROM meetings'
@@ -245,7 +367,7 @@ class DatabaseManager:
         try:
             meeting.updated_at = datetime.now().isoformat()
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self.conn as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE meetings SET title = ?, date = ?, status = ?, video_path = ?,
@@ -266,14 +388,9 @@ class DatabaseManager:
     def delete_meeting(self, meeting_id: str) -> bool:
         """Delete a meeting and related records."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Delete related records first
-                cursor.execute('DELETE FROM meeting_minutes WHERE meeting_id = ?', (meeting_id,))
-                cursor.execute('DELETE FROM transcriptions WHERE meeting_id = ?', (meeting_id,))
-                cursor.execute('DELETE FROM meetings WHERE id = ?', (meeting_id,))
-                
+            with self._lock, self.conn as conn:
+                # Transcriptions and minutes go with it via ON DELETE CASCADE
+                cursor = conn.execute('DELETE FROM meetings WHERE id = ?', (meeting_id,))
                 conn.commit()
                 return cursor.rowcount > 0
         except Exception as e:
@@ -283,17 +400,8 @@ class DatabaseManager:
     def create_transcription(self, transcription: Transcription) -> Transcription:
         """Create a new transcription record."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO transcriptions (id, meeting_id, text, language, duration, segments, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    transcription.id, transcription.meeting_id, transcription.text,
-                    transcription.language, transcription.duration, json.dumps(transcription.segments),
-                    transcription.created_at
-                ))
-                conn.commit()
+            with self._lock, self.conn as conn:
+                conn.execute(self.INSERT_TRANSCRIPTION, self._transcription_row(transcription))
                 return transcription
         except Exception as e:
             logger.error(f"Failed to create transcription: {e}")
@@ -302,7 +410,7 @@ class DatabaseManager:
     def get_transcription(self, transcription_id: str) -> Optional[Transcription]:
         """Get a transcription by ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self.conn as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT * FROM transcriptions WHERE id = ?', (transcription_id,))
                 row = cursor.fetchone()
@@ -320,7 +428,7 @@ class DatabaseManager:
     def get_transcription_by_meeting(self, meeting_id: str) -> Optional[Transcription]:
         """Get transcription by meeting ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self.conn as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT * FROM transcriptions WHERE meeting_id = ?', (meeting_id,))
                 row = cursor.fetchone()
@@ -338,18 +446,8 @@ class DatabaseManager:
     def create_meeting_minutes(self, minutes: MeetingMinutes) -> MeetingMinutes:
         """Create a new meeting minutes record."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO meeting_minutes (id, meeting_id, transcription_id, title, 
-                                               summary, artifacts, sprint_info, speakers, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    minutes.id, minutes.meeting_id, minutes.transcription_id, minutes.title,
-                    minutes.summary, json.dumps(minutes.artifacts), json.dumps(minutes.sprint_info),
-                    json.dumps(minutes.speakers), minutes.created_at
-                ))
-                conn.commit()
+            with self._lock, self.conn as conn:
+                conn.execute(self.INSERT_MEETING_MINUTES, self._meeting_minutes_row(minutes))
                 return minutes
         except Exception as e:
             logger.error(f"Failed to create meeting minutes: {e}")
@@ -358,7 +456,7 @@ class DatabaseManager:
     def get_meeting_minutes(self, minutes_id: str) -> Optional[MeetingMinutes]:
         """Get meeting minutes by ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self.conn as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT * FROM meeting_minutes WHERE id = ?', (minutes_id,))
                 row = cursor.fetchone()
@@ -377,7 +475,7 @@ class DatabaseManager:
     def get_meeting_minutes_by_meeting(self, meeting_id: str) -> Optional[MeetingMinutes]:
         """Get meeting minutes by meeting ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self.conn as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT * FROM meeting_minutes WHERE meeting_id = ?', (meeting_id,))
                 row = cursor.fetchone()
@@ -393,6 +491,13 @@ class DatabaseManager:
             logger.error(f"Failed to get meeting minutes by meeting: {e}")
             return None
 
+    def close(self):
+        """Close the database connection."""
+        if self.conn is not None:
+            self.conn.execute("PRAGMA optimize")
+            self.conn.close()
+            self.conn = None
+
 class APIService:
     def __init__(self, db_path: str = "meetings.db"):
         self.db = DatabaseManager(db_path)
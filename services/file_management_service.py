@@ -14,7 +14,7 @@ import threading
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, BinaryIO
 
 try:
     from flask import Flask, request, jsonify
@@ -32,6 +32,8 @@ class FileManagementService:
         self.input_dir = Path(input_dir)
         self.base_output_dir.mkdir(exist_ok=True)
         self.input_dir.mkdir(exist_ok=True)
+        # Resolved once; delete_input_file only accepts paths under this prefix
+        self._input_root = str(self.input_dir.resolve()) + os.sep
         
         # Start background cleanup thread
         self.cleanup_thread = threading.Thread(target=self._cleanup_old_files, daemon=True)
@@ -80,9 +82,7 @@ class FileManagementService:
         """
         try:
             output_path = Path(output_folder) / filename
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(transcript_text)
+            output_path.write_text(transcript_text, encoding='utf-8')
             
             logger.info(f"Transcript saved to: {output_path}")
             
@@ -436,10 +436,10 @@ class FileManagementService:
             Dictionary with success status
         """
         try:
-            file_path = Path(video_path)
+            file_path = Path(video_path).resolve()
             
             # Only delete files from the input directory for safety
-            if not str(file_path).startswith(str(self.input_dir)):
+            if not str(file_path).startswith(self._input_root):
                 return {
                     "success": False,
                     "error": "File is not in input directory, cannot delete for safety"
@@ -465,13 +465,18 @@ class FileManagementService:
                 "error": str(e)
             }
     
-    def zip_output_folder(self, output_folder: str, meeting_title: str) -> Dict[str, Any]:
+    def zip_output_folder(self, output_folder: str, meeting_title: str,
+                          sink: Optional[BinaryIO] = None,
+                          compression: int = zipfile.ZIP_DEFLATED) -> Dict[str, Any]:
         """
         Create a zip file containing all output files.
         
         Args:
             output_folder: Path to the output folder
             meeting_title: Title of the meeting for zip filename
+            sink: Writable binary file object to receive the archive instead of
+                the zip file in the output folder (e.g. io.BytesIO)
+            compression: zipfile compression method
             
         Returns:
             Dictionary with success status and zip file path
@@ -491,12 +496,24 @@ class FileManagementService:
             zip_path = folder_path / zip_filename
             
             # Create zip file
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for file_path in folder_path.rglob('*'):
-                    if file_path.is_file() and file_path.name != zip_filename:
-                        # Add file to zip with relative path
-                        arcname = file_path.relative_to(folder_path)
-                        zipf.write(file_path, arcname)
+            files_zipped = 0
+            with zipfile.ZipFile(sink if sink is not None else zip_path, 'w', compression) as zipf:
+                # os.walk is scandir-based, so file/dir checks come from the directory listing
+                for dir_path, _, file_names in os.walk(folder_path):
+                    for file_name in file_names:
+                        if file_name != zip_filename:
+                            # Add file to zip with relative path
+                            file_path = os.path.join(dir_path, file_name)
+                            zipf.write(file_path, os.path.relpath(file_path, folder_path))
+                            files_zipped += 1
+            
+            if sink is not None:
+                return {
+                    "success": True,
+                    "zip_path": None,
+                    "zip_size": sink.tell(),
+                    "files_zipped": files_zipped
+                }
             
             logger.info(f"Output folder zipped: {zip_path}")
             
@@ -504,7 +521,7 @@ class FileManagementService:
                 "success": True,
                 "zip_path": str(zip_path),
                 "zip_size": zip_path.stat().st_size,
-                "files_zipped": len([f for f in folder_path.rglob('*') if f.is_file() and f.name != zip_filename])
+                "files_zipped": files_zipped
             }
             
         except Exception as e:
@@ -542,6 +559,17 @@ class FileManagementService:
                 logger.error(f"Error in cleanup thread: {e}")
                 time.sleep(3600)  # Sleep for 1 hour on error
     
+    def _folder_size(self, path: str) -> int:
+        """Total size in bytes of the regular files under path."""
+        size = 0
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    size += self._folder_size(entry.path)
+                elif entry.is_file():
+                    size += entry.stat().st_size
+        return size
+    
     def get_cleanup_status(self) -> Dict[str, Any]:
         """
         Get status of file cleanup operations.
@@ -557,16 +585,16 @@ class FileManagementService:
             old_folders = 0
             total_size = 0
             
-            for folder_path in self.base_output_dir.iterdir():
-                if folder_path.is_dir():
-                    total_folders += 1
-                    folder_mtime = datetime.fromtimestamp(folder_path.stat().st_mtime)
-                    if folder_mtime < cutoff_time:
-                        old_folders += 1
-                    
-                    # Calculate folder size
-                    folder_size = sum(f.stat().st_size for f in folder_path.rglob('*') if f.is_file())
-                    total_size += folder_size
+            cutoff_ts = cutoff_time.timestamp()
+            with os.scandir(self.base_output_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        total_folders += 1
+                        if entry.stat().st_mtime < cutoff_ts:
+                            old_folders += 1
+                        
+                        # Calculate folder size
+                        total_size += self._folder_size(entry.path)
             
             return {
                 "success": True,
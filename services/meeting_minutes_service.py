@@ -9,15 +9,13 @@ import sys
 import json
 import re
 import logging
+import importlib.util
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
 
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+# openai is only needed once an API key is configured
+OPENAI_AVAILABLE = importlib.util.find_spec('openai') is not None
 
 try:
     from jinja2 import Template
@@ -43,12 +41,17 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _create_openai_client(api_key: str):
+    """Import openai on first use and build a client."""
+    import openai
+    openai.api_key = api_key
+    return openai.OpenAI(api_key=api_key)
+
 class MeetingMinutesService:
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key
         if OPENAI_AVAILABLE and api_key:
-            openai.api_key = api_key
-            self.client = openai.OpenAI(api_key=api_key)
+            self.client = _create_openai_client(api_key)
         else:
             self.client = None
     
@@ -137,7 +140,7 @@ class MeetingMinutesService:
                 return self._extract_agile_artifacts_simple(parsed_content)
                 
         except Exception as e:
-            logger.error(f"AI analysis failed: {e}. Using simple extraction.")
+            logger.error("AI analysis failed: %s. Using simple extraction.", e)
             return self._extract_agile_artifacts_simple(parsed_content)
 
     def _extract_agile_artifacts_simple(self, parsed_content: list) -> Dict[str, Any]:
@@ -284,7 +287,7 @@ class MeetingMinutesService:
             return response.choices[0].message.content.strip()
             
         except Exception as e:
-            logger.error(f"AI summary generation failed: {e}. Using simple summary.")
+            logger.error("AI summary generation failed: %s. Using simple summary.", e)
             return self._generate_tpm_summary_simple(parsed_content, artifacts, sprint_info)
 
     def _generate_tpm_summary_simple(self, parsed_content: list, artifacts: Dict[str, Any], 
@@ -428,11 +431,11 @@ class MeetingMinutesService:
             
             # Save document
             doc.save(output_path)
-            logger.info(f"DOCX document saved to: {output_path}")
+            logger.info("DOCX document saved to: %s", output_path)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to save DOCX: {e}")
+            logger.error("Failed to save DOCX: %s", e)
             return False
 
     def save_html(self, meeting_data: Dict[str, Any], output_path: str) -> bool:
@@ -541,11 +544,11 @@ class MeetingMinutesService:
             with open(output_path, 'w', encoding='utf-8') as f:
                 f.write(html_content)
             
-            logger.info(f"HTML document saved to: {output_path}")
+            logger.info("HTML document saved to: %s", output_path)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to save HTML: {e}")
+            logger.error("Failed to save HTML: %s", e)
             return False
 
     def _save_html_simple(self, meeting_data: Dict[str, Any], output_path: str) -> bool:
@@ -620,11 +623,11 @@ class MeetingMinutesService:
             with open(output_path, 'w', encoding='utf-8') as f:
                 f.write(html_content)
             
-            logger.info(f"HTML document saved to: {output_path}")
+            logger.info("HTML document saved to: %s", output_path)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to save HTML: {e}")
+            logger.error("Failed to save HTML: %s", e)
             return False
 
 
@@ -676,7 +679,7 @@ if FLASK_AVAILABLE:
             })
             
         except Exception as e:
-            logger.error(f"API error: {e}")
+            logger.error("API error: %s", e)
             return jsonify({
                 "success": False,
                 "error": str(e)
@@ -704,7 +707,7 @@ if FLASK_AVAILABLE:
             })
             
         except Exception as e:
-            logger.error(f"DOCX save error: {e}")
+            logger.error("DOCX save error: %s", e)
             return jsonify({
                 "success": False,
                 "error": str(e)
@@ -732,7 +735,7 @@ if FLASK_AVAILABLE:
             })
             
         except Exception as e:
-            logger.error(f"HTML save error: {e}")
+            logger.error("HTML save error: %s", e)
             return jsonify({
                 "success": False,
                 "error": str(e)
@@ -743,9 +746,9 @@ if FLASK_AVAILABLE:
         if api_key:
             meeting_minutes_service.api_key = api_key
             if OPENAI_AVAILABLE:
-                meeting_minutes_service.client = openai.OpenAI(api_key=api_key)
+                meeting_minutes_service.client = _create_openai_client(api_key)
         
-        logger.info(f"Starting Meeting Minutes Service on {host}:{port}")
+        logger.info("Starting Meeting Minutes Service on %s:%s", host, port)
         app.run(host=host, port=port, debug=debug)
 
 else:
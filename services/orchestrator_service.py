@@ -11,13 +11,19 @@ import os
 import sys
 import json
 import time
+import random
 import uuid
-import queue
+import functools
+import shutil
 import threading
 import logging
-from dataclasses import dataclass, asdict, field
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from pathlib import Path
+from typing import Dict, Any, Deque, Optional, List
+from urllib.parse import urlparse
 
 try:
     from flask import Flask, request, jsonify
@@ -25,7 +31,11 @@ try:
 except ImportError:
     FLASK_AVAILABLE = False
 
-import requests
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,6 +49,42 @@ FILES_URL = os.getenv('FILE_MANAGEMENT_SERVICE_URL', 'http://localhost:5003')
 # Retry policy defaults
 DEFAULT_MAX_RETRIES = 3
 DEFAULT_RETRY_BACKOFF_SEC = 3
+DEFAULT_MAX_BACKOFF_SEC = 30
+
+# Number of workflows executed concurrently
+DEFAULT_MAX_CONCURRENCY = int(os.getenv('ORCH_MAX_CONCURRENCY', '4'))
+
+# Hosts for which the file management service shares our filesystem
+LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1'}
+
+# Number of independently locked partitions of the instance map (power of two)
+INSTANCE_SHARDS = 16
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# How long a /health dependency check is reused
+HEALTH_CACHE_TTL_SEC = 1.0
+
+
+def _lazy_requests():
+    """Import requests on first outbound call; status and list endpoints never need it."""
+    import requests
+    return requests
+
+
+def _json_dumps(obj: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _json_loads(raw: bytes) -> Any:
+    return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+
+
+def _isonow(ts: Optional[float] = None) -> str:
+    """ISO-8601 local timestamp (ms precision) for an epoch time, defaulting to now."""
+    return datetime.fromtimestamp(time.time() if ts is None else ts).isoformat(timespec='milliseconds')
 
 
 class WorkflowStatus:
@@ -58,6 +104,20 @@ class WorkflowStepResult:
     details: Dict[str, Any] = field(default_factory=dict)
     error: Optional[str] = None
 
+    def to_dict(self, include_details: bool = True) -> Dict[str, Any]:
+        # Shallow projection; asdict() would deep-copy potentially large transcript details
+        data = {
+            'step': self.step,
+            'success': self.success,
+            'started_at': self.started_at,
+            'ended_at': self.ended_at,
+            'duration_sec': self.duration_sec,
+            'error': self.error,
+        }
+        if include_details:
+            data['details'] = self.details
+        return data
+
 
 @dataclass
 class WorkflowInstance:
@@ -66,10 +126,24 @@ class WorkflowInstance:
     input: Dict[str, Any]
     created_at: str
     updated_at: str
-    steps: List[WorkflowStepResult] = field(default_factory=list)
+    steps: Deque[WorkflowStepResult] = field(default_factory=deque)
     output: Dict[str, Any] = field(default_factory=dict)
     error: Optional[str] = None
 
+    def to_dict(self, include_step_details: bool = False) -> Dict[str, Any]:
+        """API projection; step details are kept for failed steps or when explicitly requested."""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'input': self.input,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            # list() snapshots the deque in one step; iterating it directly while the worker appends would raise
+            'steps': [s.to_dict(include_details=include_step_details or not s.success) for s in list(self.steps)],
+            'output': self.output,
+            'error': self.error,
+        }
+
 
 class OrchestratorEngine:
     def __init__(self,
@@ -77,24 +151,32 @@ class OrchestratorEngine:
                  minutes_url: str = MINUTES_URL,
                  files_url: str = FILES_URL,
                  max_retries: int = DEFAULT_MAX_RETRIES,
-                 retry_backoff: int = DEFAULT_RETRY_BACKOFF_SEC):
+                 retry_backoff: int = DEFAULT_RETRY_BACKOFF_SEC,
+                 max_backoff: int = DEFAULT_MAX_BACKOFF_SEC,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
         self.transcription_url = transcription_url
         self.minutes_url = minutes_url
         self.files_url = files_url
         self.max_retries = max_retries
         self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self._files_local = urlparse(files_url).hostname in LOCAL_HOSTS
+        # One keep-alive session per worker thread
+        self._local = threading.local()
 
-        self._instances: Dict[str, WorkflowInstance] = {}
-        self._queue: "queue.Queue[str]" = queue.Queue()
-        self._lock = threading.Lock()
+        self._shards: List[Dict[str, WorkflowInstance]] = [{} for _ in range(INSTANCE_SHARDS)]
+        self._shard_locks = [threading.Lock() for _ in range(INSTANCE_SHARDS)]
 
-        self._worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-        self._worker_thread.start()
+        # Workflows mostly wait on HTTP calls to other services, so run several at once
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='orch')
+        # Futures not yet finished, so shutdown can cancel the queued ones (cancel_futures needs 3.9)
+        self._futures = set()
+        self._futures_lock = threading.Lock()
 
     # Public API
     def start_workflow(self, payload: Dict[str, Any]) -> WorkflowInstance:
         wf_id = str(uuid.uuid4())
-        now = datetime.now().isoformat()
+        now = _isonow()
         instance = WorkflowInstance(
             id=wf_id,
             status=WorkflowStatus.PENDING,
@@ -102,44 +184,70 @@ class OrchestratorEngine:
             created_at=now,
             updated_at=now,
         )
-        with self._lock:
-            self._instances[wf_id] = instance
-        self._queue.put(wf_id)
-        logger.info(f"Queued workflow {wf_id}")
+        idx = self._shard_index(wf_id)
+        with self._shard_locks[idx]:
+            self._shards[idx][wf_id] = instance
+        future = self._executor.submit(self._run_instance, instance)
+        with self._futures_lock:
+            self._futures.add(future)
+        future.add_done_callback(functools.partial(self._on_workflow_done, instance))
+        logger.info("Queued workflow %s", wf_id)
         return instance
 
     def get_instance(self, wf_id: str) -> Optional[WorkflowInstance]:
-        with self._lock:
-            return self._instances.get(wf_id)
+        idx = self._shard_index(wf_id)
+        with self._shard_locks[idx]:
+            return self._shards[idx].get(wf_id)
 
     def list_instances(self, limit: int = 50, status: Optional[str] = None) -> List[WorkflowInstance]:
-        with self._lock:
-            items = list(self._instances.values())
+        items = []
+        for shard, lock in zip(self._shards, self._shard_locks):
+            with lock:
+                items.extend(shard.values())
         if status:
             items = [i for i in items if i.status == status]
         # Sort by created_at desc
         items.sort(key=lambda x: x.created_at, reverse=True)
         return items[:limit]
 
+    def _shard_index(self, wf_id: str) -> int:
+        return hash(wf_id) & (INSTANCE_SHARDS - 1)
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """Stop accepting workflows; optionally fail the ones that have not started yet."""
+        if cancel_pending:
+            with self._futures_lock:
+                futures = list(self._futures)
+            # Only futures that have not started can be cancelled; running ones finish normally
+            for future in futures:
+                future.cancel()
+        self._executor.shutdown(wait=wait)
+
     # Worker
-    def _worker_loop(self):
-        while True:
-            try:
-                wf_id = self._queue.get()
-                instance = self.get_instance(wf_id)
-                if not instance:
-                    continue
-                self._run_instance(instance)
-            except Exception as e:
-                logger.exception(f"Worker loop error: {e}")
+    def _on_workflow_done(self, instance: WorkflowInstance, future: Future):
+        with self._futures_lock:
+            self._futures.discard(future)
+        if future.cancelled():
+            instance.error = 'cancelled before start'
+            self._update_status(instance, WorkflowStatus.FAILED)
+            return
+        error = future.exception()
+        if error is None:
+            return
+        logger.error("Worker error in workflow %s: %r", instance.id, error, exc_info=error)
+        # _run_instance handles ordinary failures; this covers anything that escaped it
+        if instance.status not in (WorkflowStatus.COMPLETED, WorkflowStatus.FAILED):
+            instance.error = str(error) or type(error).__name__
+            self._update_status(instance, WorkflowStatus.FAILED)
 
     def _update_status(self, instance: WorkflowInstance, status: str):
+        # Status transitions only; _record_step bumps updated_at itself from its own clock read
         instance.status = status
-        instance.updated_at = datetime.now().isoformat()
+        instance.updated_at = _isonow()
 
     def _record_step(self, instance: WorkflowInstance, step: str, fn, *, retries: int = None, **kwargs) -> Dict[str, Any]:
         started = time.time()
-        started_at = datetime.now().isoformat()
+        started_at = _isonow(started)
         attempt = 0
         last_error = None
         max_retries = self.max_retries if retries is None else retries
@@ -148,104 +256,173 @@ class OrchestratorEngine:
             try:
                 result = fn(**kwargs)
                 ended = time.time()
+                ended_at = _isonow(ended)
                 step_result = WorkflowStepResult(
                     step=step,
                     success=True,
                     started_at=started_at,
-                    ended_at=datetime.now().isoformat(),
+                    ended_at=ended_at,
                     duration_sec=ended - started,
                     details=result
                 )
                 instance.steps.append(step_result)
-                self._update_status(instance, instance.status)  # update timestamp
+                instance.updated_at = ended_at
                 return result
             except Exception as e:
                 last_error = str(e)
                 attempt += 1
                 if attempt > max_retries:
                     ended = time.time()
+                    ended_at = _isonow(ended)
                     step_result = WorkflowStepResult(
                         step=step,
                         success=False,
                         started_at=started_at,
-                        ended_at=datetime.now().isoformat(),
+                        ended_at=ended_at,
                         duration_sec=ended - started,
                         error=last_error
                     )
                     instance.steps.append(step_result)
-                    self._update_status(instance, instance.status)
+                    instance.updated_at = ended_at
                     raise
-                # backoff
-                time.sleep(self.retry_backoff * attempt)
+                time.sleep(self._backoff_delay(attempt))
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Truncated exponential backoff with jitter so concurrent workflows don't retry in lockstep;
+        # the jitter scales the capped delay down, so retries past the cap stay spread out too
+        return min(self.max_backoff, self.retry_backoff * (1 << (attempt - 1))) * random.uniform(0.5, 1.0)
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = _lazy_requests().Session()
+        return session
+
+    def _post(self, url: str, payload: Dict[str, Any], timeout: int, stream: bool = False):
+        return self._session().post(url, data=_json_dumps(payload), headers=JSON_HEADERS,
+                                    timeout=timeout, stream=stream)
 
     # Actual step callouts
     def _call_transcription(self, video_path: str, language: Optional[str]) -> Dict[str, Any]:
         payload = {"video_path": video_path, "language": language, "word_timestamps": True}
-        r = requests.post(f"{self.transcription_url}/transcribe", json=payload, timeout=600)
+        with self._post(f"{self.transcription_url}/transcribe-stream", payload, timeout=600, stream=True) as r:
+            if r.status_code == 404:
+                # Transcription service predates /transcribe-stream
+                return self._call_transcription_buffered(payload)
+            if r.status_code != 200:
+                raise Exception(f"transcribe HTTP {r.status_code}")
+            transcript_data = None
+            segments = []
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                item = _json_loads(line)
+                if 'error' in item:
+                    raise Exception(f"transcribe failed: {item['error']}")
+                if 'header' in item:
+                    transcript_data = item['header']
+                elif item.get('done'):
+                    break
+                else:
+                    segments.append(item)
+            else:
+                raise Exception("transcribe stream ended before completion")
+        if transcript_data is None:
+            raise Exception("transcribe stream missing header")
+        transcript_data['segments'] = segments
+        return {"success": True, "error": None, "data": transcript_data}
+
+    def _call_transcription_buffered(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        r = self._post(f"{self.transcription_url}/transcribe", payload, timeout=600)
         if r.status_code != 200:
             raise Exception(f"transcribe HTTP {r.status_code}")
-        data = r.json()
+        data = _json_loads(r.content)
         if not data.get("success"):
             raise Exception(f"transcribe failed: {data.get('error')}")
         return data
 
     def _format_transcript(self, transcript_data: Dict[str, Any]) -> Dict[str, Any]:
-        r = requests.post(f"{self.transcription_url}/format-transcript", json={"transcript_data": transcript_data}, timeout=60)
+        r = self._post(f"{self.transcription_url}/format-transcript", {"transcript_data": transcript_data}, timeout=60)
         if r.status_code != 200:
             raise Exception(f"format HTTP {r.status_code}")
-        data = r.json()
+        data = _json_loads(r.content)
         if not data.get("success"):
             raise Exception(f"format failed: {data.get('error')}")
         return data
 
     def _generate_minutes(self, transcription_text: str, meeting_title: str, meeting_date: Optional[str]) -> Dict[str, Any]:
         payload = {"transcription_text": transcription_text, "meeting_title": meeting_title, "meeting_date": meeting_date}
-        r = requests.post(f"{self.minutes_url}/generate-minutes", json=payload, timeout=180)
+        r = self._post(f"{self.minutes_url}/generate-minutes", payload, timeout=180)
         if r.status_code != 200:
             raise Exception(f"minutes HTTP {r.status_code}")
-        data = r.json()
+        data = _json_loads(r.content)
         if not data.get("success"):
             raise Exception(f"minutes failed: {data.get('error')}")
         return data
 
     def _create_folder(self, meeting_title: str, meeting_date: Optional[str]) -> Dict[str, Any]:
-        r = requests.post(f"{self.files_url}/create-dated-folder", json={"meeting_title": meeting_title, "meeting_date": meeting_date}, timeout=30)
+        r = self._post(f"{self.files_url}/create-dated-folder", {"meeting_title": meeting_title, "meeting_date": meeting_date}, timeout=30)
         if r.status_code != 200:
             raise Exception(f"folder HTTP {r.status_code}")
-        data = r.json()
+        data = _json_loads(r.content)
         if not data.get("success"):
             raise Exception(f"folder failed: {data.get('error')}")
         return data
 
     def _save_transcript(self, transcript_text: str, output_folder: str) -> Dict[str, Any]:
-        r = requests.post(f"{self.files_url}/save-transcript", json={"transcript_text": transcript_text, "output_folder": output_folder, "filename": "transcript.txt"}, timeout=60)
+        r = self._post(f"{self.files_url}/save-transcript", {"transcript_text": transcript_text, "output_folder": output_folder, "filename": "transcript.txt"}, timeout=60)
         if r.status_code != 200:
             raise Exception(f"save transcript HTTP {r.status_code}")
-        return r.json()
+        return _json_loads(r.content)
 
     def _save_docx(self, meeting_data: Dict[str, Any], output_folder: str) -> Dict[str, Any]:
-        r = requests.post(f"{self.files_url}/save-meeting-minutes-docx", json={"meeting_data": meeting_data, "output_folder": output_folder, "filename": "meeting_minutes.docx"}, timeout=120)
+        r = self._post(f"{self.files_url}/save-meeting-minutes-docx", {"meeting_data": meeting_data, "output_folder": output_folder, "filename": "meeting_minutes.docx"}, timeout=120)
         if r.status_code != 200:
             raise Exception(f"save docx HTTP {r.status_code}")
-        return r.json()
+        return _json_loads(r.content)
 
     def _save_html(self, meeting_data: Dict[str, Any], output_folder: str) -> Dict[str, Any]:
-        r = requests.post(f"{self.files_url}/save-meeting-minutes-html", json={"meeting_data": meeting_data, "output_folder": output_folder, "filename": "meeting_minutes.html"}, timeout=60)
+        r = self._post(f"{self.files_url}/save-meeting-minutes-html", {"meeting_data": meeting_data, "output_folder": output_folder, "filename": "meeting_minutes.html"}, timeout=60)
         if r.status_code != 200:
             raise Exception(f"save html HTTP {r.status_code}")
-        return r.json()
+        return _json_loads(r.content)
+
+    def _local_copy_video(self, video_path: str, output_folder: str) -> Dict[str, Any]:
+        """Copy the video on this host: hardlink when possible, else a kernel-side copy."""
+        source_path = Path(video_path)
+        if not source_path.exists():
+            raise FileNotFoundError(f"Source video not found: {video_path}")
+        dest_path = Path(output_folder) / source_path.name
+        if dest_path.exists():
+            dest_path.unlink()
+        try:
+            os.link(source_path, dest_path)
+        except OSError:
+            # Cross-device or unsupported; copyfile uses sendfile/copy_file_range where available
+            shutil.copy2(source_path, dest_path)
+        return {
+            "success": True,
+            "file_path": str(dest_path),
+            "file_size": dest_path.stat().st_size,
+            "error": None
+        }
 
     def _copy_video(self, video_path: str, output_folder: str) -> Dict[str, Any]:
-        r = requests.post(f"{self.files_url}/copy-video", json={"video_path": video_path, "output_folder": output_folder}, timeout=120)
+        if self._files_local:
+            try:
+                return self._local_copy_video(video_path, output_folder)
+            except OSError as e:
+                logger.warning("Local video copy failed, falling back to file service: %s", e)
+        r = self._post(f"{self.files_url}/copy-video", {"video_path": video_path, "output_folder": output_folder}, timeout=120)
         if r.status_code != 200:
             raise Exception(f"copy video HTTP {r.status_code}")
-        return r.json()
+        return _json_loads(r.content)
 
     def _create_summary(self, output_folder: str, workflow_data: Dict[str, Any]) -> Dict[str, Any]:
-        r = requests.post(f"{self.files_url}/create-workflow-summary", json={"output_folder": output_folder, "workflow_data": workflow_data}, timeout=60)
+        r = self._post(f"{self.files_url}/create-workflow-summary", {"output_folder": output_folder, "workflow_data": workflow_data}, timeout=60)
         if r.status_code != 200:
             raise Exception(f"summary HTTP {r.status_code}")
-        return r.json()
+        return _json_loads(r.content)
 
     def _run_instance(self, instance: WorkflowInstance):
         self._update_status(instance, WorkflowStatus.RUNNING)
@@ -341,7 +518,7 @@ class OrchestratorEngine:
                 'meeting_title': meeting_title,
                 'meeting_date': meeting_date or datetime.now().isoformat(),
                 'language': language,
-                'steps': [asdict(s) for s in instance.steps]
+                'steps': [s.to_dict() for s in instance.steps]
             }
             summary = self._record_step(
                 instance,
@@ -362,11 +539,11 @@ class OrchestratorEngine:
                 }
             }
             self._update_status(instance, WorkflowStatus.COMPLETED)
-            logger.info(f"Workflow {instance.id} completed")
+            logger.info("Workflow %s completed", instance.id)
         except Exception as e:
             instance.error = str(e)
             self._update_status(instance, WorkflowStatus.FAILED)
-            logger.error(f"Workflow {instance.id} failed: {e}")
+            logger.error("Workflow %s failed: %s", instance.id, e)
 
 
 # Flask API
@@ -374,21 +551,33 @@ if FLASK_AVAILABLE:
     app = Flask(__name__)
     engine = OrchestratorEngine()
 
+    _health_lock = threading.Lock()
+    _health_cache: Dict[str, Any] = {}
+    _health_cache_ts = float('-inf')
+
+    def _ping(url: str) -> Dict[str, Any]:
+        try:
+            r = _lazy_requests().get(url, timeout=2)
+            return {'ok': r.status_code == 200}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
     @app.route('/health', methods=['GET'])
     def health():
-        # Optionally ping dependencies
-        deps = {}
-        for name, url, path in [
-            ('transcription', TRANSCRIPTION_URL, '/health'),
-            ('meeting_minutes', MINUTES_URL, '/health'),
-            ('file_management', FILES_URL, '/health'),
-        ]:
-            try:
-                r = requests.get(url + path, timeout=2)
-                deps[name] = {'ok': r.status_code == 200}
-            except Exception as e:
-                deps[name] = {'ok': False, 'error': str(e)}
-        return jsonify({'status': 'healthy', 'service': 'orchestrator', 'dependencies': deps})
+        global _health_cache, _health_cache_ts
+        # Bursts of probes share one dependency check per HEALTH_CACHE_TTL_SEC
+        with _health_lock:
+            if time.monotonic() - _health_cache_ts >= HEALTH_CACHE_TTL_SEC:
+                targets = {
+                    'transcription': TRANSCRIPTION_URL + '/health',
+                    'meeting_minutes': MINUTES_URL + '/health',
+                    'file_management': FILES_URL + '/health',
+                }
+                with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+                    results = dict(zip(targets, pool.map(_ping, targets.values())))
+                _health_cache = {'status': 'healthy', 'service': 'orchestrator', 'dependencies': results}
+                _health_cache_ts = time.monotonic()
+            return jsonify(_health_cache)
 
     @app.route('/workflows', methods=['POST'])
     def start_workflow():
@@ -411,18 +600,22 @@ if FLASK_AVAILABLE:
         instance = engine.get_instance(wf_id)
         if not instance:
             return jsonify({'success': False, 'error': 'not found'}), 404
-        return jsonify({'success': True, 'data': asdict(instance)})
+        verbose = request.args.get('verbose', '').lower() in ('1', 'true', 'yes')
+        return jsonify({'success': True, 'data': instance.to_dict(include_step_details=verbose)})
 
     @app.route('/workflows', methods=['GET'])
     def list_workflows():
         limit = int(request.args.get('limit', 50))
         status = request.args.get('status')
-        items = [asdict(i) for i in engine.list_instances(limit=limit, status=status)]
+        items = [i.to_dict(include_step_details=False) for i in engine.list_instances(limit=limit, status=status)]
         return jsonify({'success': True, 'data': items, 'count': len(items)})
 
     def run_service(host='localhost', port=5000, debug=False):
-        logger.info(f"Starting Orchestrator Service on {host}:{port}")
-        app.run(host=host, port=port, debug=debug)
+        logger.info("Starting Orchestrator Service on %s:%s", host, port)
+        try:
+            app.run(host=host, port=port, debug=debug)
+        finally:
+            engine.shutdown(cancel_pending=True)
 else:
     def run_service(host='localhost', port=5000, debug=False):
         logger.error("Flask not available. Cannot run orchestrator service.")
@@ -7,32 +7,55 @@ Handles video transcription using faster-whisper with REST API interface.
 import os
 import sys
 import json
+import hashlib
+import importlib.util
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 
-try:
-    from faster_whisper import WhisperModel
-    WHISPER_AVAILABLE = True
-except ImportError:
-    WHISPER_AVAILABLE = False
+# faster-whisper pulls in CTranslate2; only check it is installed and import it when loading a model
+WHISPER_AVAILABLE = importlib.util.find_spec('faster_whisper') is not None
 
 try:
-    from flask import Flask, request, jsonify
+    from flask import Flask, Response, request, jsonify
     FLASK_AVAILABLE = True
 except ImportError:
     FLASK_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Transcript cache (set TRANSCRIPTION_CACHE_DIR to an empty string to disable)
+TRANSCRIPT_CACHE_DIR = os.getenv('TRANSCRIPTION_CACHE_DIR', './cache/transcripts')
+MEMORY_CACHE_SIZE = 8
+
+def _ndjson_line(obj: Dict[str, Any]) -> bytes:
+    """Encode one NDJSON record."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj) + b'\n'
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8') + b'\n'
+
 class TranscriptionService:
-    def __init__(self, model_size='small', device='auto', compute_type='auto'):
+    def __init__(self, model_size='small', device='auto', compute_type='auto',
+                 cpu_threads=None, num_workers=2, cache_dir=TRANSCRIPT_CACHE_DIR):
         self.model_size = model_size
         self.device = device
         self.compute_type = compute_type
+        self.cpu_threads = cpu_threads if cpu_threads is not None else (os.cpu_count() or 0)
+        self.num_workers = num_workers
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._memory_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
         self.model = None
         self._initialize_model()
     
@@ -43,23 +66,26 @@ class TranscriptionService:
             return
         
         try:
-            # Auto-select compute type if requested
+            # Auto-select compute type if requested: CTranslate2 has no float16 on CPU
             if self.compute_type == 'auto':
-                if self.device == 'cuda':
-                    self.compute_type = 'float16'
-                else:
-                    self.compute_type = 'int8'
+                self.compute_type = 'int8_float16' if self.device == 'cuda' else 'int8'
             
-            self.model = WhisperModel(
-                self.model_size, 
-                device=self.device, 
-                compute_type=self.compute_type
-            )
-            logger.info(f"Whisper model {self.model_size} initialized successfully")
+            self.model = self._load_model()
+            logger.info("Whisper model %s initialized successfully (%s)", self.model_size, self.compute_type)
         except Exception as e:
-            logger.error(f"Failed to initialize Whisper model: {e}")
+            logger.error("Failed to initialize Whisper model: %s", e)
             self.model = None
     
+    def _load_model(self):
+        from faster_whisper import WhisperModel
+        return WhisperModel(
+            self.model_size,
+            device=self.device,
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=self.num_workers
+        )
+    
     def transcribe_video(self, video_path: str, language: Optional[str] = None, 
                         word_timestamps: bool = True) -> Dict[str, Any]:
         """
@@ -88,45 +114,13 @@ class TranscriptionService:
             }
         
         try:
-            logger.info(f"Starting transcription of: {video_path}")
-            
-            # Transcribe with timestamps
-            segments, info = self.model.transcribe(
-                video_path,
-                language=language,
-                beam_size=1,
-                vad_filter=True,
-                word_timestamps=word_timestamps
-            )
+            logger.info("Starting transcription of: %s", video_path)
             
-            # Collect segments
-            transcript_data = {
-                'language': info.language,
-                'duration': info.duration,
-                'segments': []
-            }
-            
-            for segment in segments:
-                segment_data = {
-                    'start': segment.start,
-                    'end': segment.end,
-                    'text': segment.text.strip()
-                }
-                
-                # Add word-level timestamps if available
-                if word_timestamps and hasattr(segment, 'words') and segment.words:
-                    segment_data['words'] = [
-                        {
-                            'start': word.start,
-                            'end': word.end,
-                            'text': word.word.strip()
-                        }
-                        for word in segment.words if word.word
-                    ]
-                
-                transcript_data['segments'].append(segment_data)
-            
-            logger.info(f"Transcription completed. Found {len(transcript_data['segments'])} segments")
+            stream = self.iter_transcription(video_path, language, word_timestamps)
+            transcript_data = next(stream)
+            transcript_data['segments'] = list(stream)
+
+            logger.info("Transcription completed. Found %d segments", len(transcript_data['segments']))
             
             return {
                 "success": True,
@@ -135,31 +129,125 @@ class TranscriptionService:
             }
             
         except Exception as e:
-            logger.error(f"Transcription failed: {e}")
+            logger.error("Transcription failed: %s", e)
             return {
                 "success": False,
                 "error": str(e),
                 "data": None
             }
     
+    def iter_transcription(self, video_path: str, language: Optional[str] = None,
+                           word_timestamps: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Transcribe a video file incrementally.
+        
+        Yields a header dict with ``language`` and ``duration`` followed by one
+        dict per segment as the model emits it. The complete transcript is
+        cached once the last segment has been produced.
+        """
+        cache_key = self._cache_key(video_path, language, word_timestamps)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.info("Using cached transcription for: %s", video_path)
+            yield {'language': cached['language'], 'duration': cached['duration']}
+            yield from cached['segments']
+            return
+        
+        # Transcribe with timestamps
+        segments, info = self.model.transcribe(
+            video_path,
+            language=language,
+            beam_size=1,
+            vad_filter=True,
+            word_timestamps=word_timestamps
+        )
+        yield {'language': info.language, 'duration': info.duration}
+        
+        collected = []
+        append = collected.append
+        for segment in segments:
+            segment_data = {
+                'start': segment.start,
+                'end': segment.end,
+                'text': segment.text.strip()
+            }
+
+            # Add word-level timestamps only when requested and available
+            if word_timestamps:
+                words = getattr(segment, 'words', None)
+                if words:
+                    segment_data['words'] = [
+                        {'start': word.start, 'end': word.end, 'text': word.word.strip()}
+                        for word in words if word.word
+                    ]
+
+            append(segment_data)
+            yield segment_data
+
+        self._cache_put(cache_key, {
+            'language': info.language,
+            'duration': info.duration,
+            'segments': collected
+        })
+    
+    def _cache_key(self, video_path: str, language: Optional[str], word_timestamps: bool) -> str:
+        """Key a transcript by file identity (path, mtime, size) and model configuration."""
+        st = os.stat(video_path)
+        raw = (f"{os.path.abspath(video_path)}|{st.st_mtime_ns}|{st.st_size}|{self.model_size}|"
+               f"{self.compute_type}|{language}|{bool(word_timestamps)}")
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._cache_lock:
+            if key in self._memory_cache:
+                self._memory_cache.move_to_end(key)
+                return self._memory_cache[key]
+        if not self.cache_dir:
+            return None
+        cache_file = self.cache_dir / f"{key}.json"
+        try:
+            raw = cache_file.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+        except ValueError as e:
+            logger.warning("Ignoring unreadable transcript cache %s: %s", cache_file, e)
+            return None
+        self._remember(key, data)
+        return data
+
+    def _cache_put(self, key: str, data: Dict[str, Any]):
+        self._remember(key, data)
+        if not self.cache_dir:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            cache_file = self.cache_dir / f"{key}.json"
+            tmp_file = cache_file.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+            payload = orjson.dumps(data) if ORJSON_AVAILABLE else json.dumps(data, ensure_ascii=False).encode('utf-8')
+            tmp_file.write_bytes(payload)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning("Failed to write transcript cache: %s", e)
+
+    def _remember(self, key: str, data: Dict[str, Any]):
+        with self._cache_lock:
+            self._memory_cache[key] = data
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > MEMORY_CACHE_SIZE:
+                self._memory_cache.popitem(last=False)
+
     def format_transcript_for_meeting_minutes(self, transcript_data: Dict[str, Any]) -> str:
         """Format transcript data for meeting minutes generator."""
-        lines = []
-        
-        for segment in transcript_data['segments']:
-            start_time = segment['start']
-            text = segment['text']
-            
+        def format_line(segment):
             # Format timestamp as HH:MM:SS
-            hours = int(start_time // 3600)
-            minutes = int((start_time % 3600) // 60)
-            seconds = int(start_time % 60)
-            timestamp = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-            
+            hours, rem = divmod(int(segment['start']), 3600)
+            minutes, seconds = divmod(rem, 60)
             # Use generic speaker since we don't have speaker diarization
-            lines.append(f"[{timestamp}] Speaker: {text}")
-        
-        return '\n'.join(lines)
+            return f"[{hours:02d}:{minutes:02d}:{seconds:02d}] Speaker: {segment['text']}"
+
+        return '\n'.join(format_line(segment) for segment in transcript_data['segments'])
 
 
 # Flask API Service
@@ -203,12 +291,55 @@ if FLASK_AVAILABLE:
                 return jsonify(result), 500
                 
         except Exception as e:
-            logger.error(f"API error: {e}")
+            logger.error("API error: %s", e)
             return jsonify({
                 "success": False,
                 "error": str(e)
             }), 500
 
+    @app.route('/transcribe-stream', methods=['POST'])
+    def transcribe_stream():
+        """Transcribe a video file, streaming segments as NDJSON.
+
+        The first line is ``{"header": {"language", "duration"}}``, followed by
+        one segment object per line and a closing ``{"done": true, "segments": n}``.
+        Failures after the header are reported as an ``{"error": ...}`` line.
+        """
+        data = request.get_json(silent=True)
+        
+        if not data or 'video_path' not in data:
+            return jsonify({
+                "success": False,
+                "error": "video_path is required"
+            }), 400
+        
+        video_path = data['video_path']
+        language = data.get('language')
+        word_timestamps = data.get('word_timestamps', True)
+        
+        if not transcription_service.model:
+            return jsonify({"success": False, "error": "Whisper model not initialized"}), 500
+        if not os.path.exists(video_path):
+            return jsonify({"success": False, "error": f"Video file not found: {video_path}"}), 500
+        
+        def generate():
+            count = 0
+            try:
+                logger.info("Starting streamed transcription of: %s", video_path)
+                stream = transcription_service.iter_transcription(video_path, language, word_timestamps)
+                yield _ndjson_line({'header': next(stream)})
+                for segment_data in stream:
+                    count += 1
+                    yield _ndjson_line(segment_data)
+            except Exception as e:
+                logger.error("Streamed transcription failed: %s", e)
+                yield _ndjson_line({'error': str(e)})
+                return
+            logger.info("Streamed transcription completed. Sent %d segments", count)
+            yield _ndjson_line({'done': True, 'segments': count})
+        
+        return Response(generate(), mimetype='application/x-ndjson')
+
     @app.route('/format-transcript', methods=['POST'])
     def format_transcript():
         """Format transcript for meeting minutes."""
@@ -231,7 +362,7 @@ if FLASK_AVAILABLE:
             })
             
         except Exception as e:
-            logger.error(f"Format error: {e}")
+            logger.error("Format error: %s", e)
             return jsonify({
                 "success": False,
                 "error": str(e)
@@ -239,7 +370,7 @@ if FLASK_AVAILABLE:
 
     def run_service(host='localhost', port=5001, debug=False):
         """Run the transcription service."""
-        logger.info(f"Starting Transcription Service on {host}:{port}")
+        logger.info("Starting Transcription Service on %s:%s", host, port)
         app.run(host=host, port=port, debug=debug)
 
 else:
@@ -258,6 +389,9 @@ if __name__ == "__main__":
     parser.add_argument('--model', default='small', help='Whisper model size')
     parser.add_argument('--device', default='auto', help='Device to use')
     parser.add_argument('--compute-type', default='auto', help='Compute type')
+    parser.add_argument('--cpu-threads', type=int, default=None, help='CTranslate2 CPU threads (default: all cores)')
+    parser.add_argument('--num-workers', type=int, default=2, help='Concurrent transcriptions per model')
+    parser.add_argument('--cache-dir', default=TRANSCRIPT_CACHE_DIR, help='Transcript cache directory (empty to disable)')
     parser.add_argument('--debug', action='store_true', help='Enable debug mode')
     
     args = parser.parse_args()
@@ -266,7 +400,10 @@ if __name__ == "__main__":
     transcription_service = TranscriptionService(
         model_size=args.model,
         device=args.device,
-        compute_type=args.compute_type
+        compute_type=args.compute_type,
+        cpu_threads=args.cpu_threads,
+        num_workers=args.num_workers,
+        cache_dir=args.cache_dir
     )
     
     run_service(host=args.host, port=args.port, debug=args.debug)
@@ -8,27 +8,41 @@ Uses faster-whisper's built-in segment processing.
 import os
 import sys
 import argparse
+import hashlib
 import json
 from pathlib import Path
-from datetime import datetime
+
+from transcriber import WRITE_BUFFER_SIZE, AUDIO_SAMPLE_RATE, check_whisper, load_model, iter_segments, _fmt_hms
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 try:
-    from faster_whisper import WhisperModel
-    WHISPER_AVAILABLE = True
+    from tqdm import tqdm
 except ImportError:
-    WHISPER_AVAILABLE = False
+    tqdm = None
 
+# Decoded audio cache for --cache-features, kept out of the input's directory
+AUDIO_CACHE_DIR = os.getenv('AUDIO_CACHE_DIR', './cache/audio')
 
-def transcribe_video_chunks(input_path, model_size='tiny', language=None, chunk_duration=300):
-    """Transcribe a video file in chunks using faster-whisper's segment processing."""
+
+def transcribe_video_chunks(input_path, model_size='tiny', language=None, chunk_duration=300,
+                            output_dir='./chunked_transcript', batch_size=8,
+                            vad_threshold=0.5, min_silence_ms=500, word_timestamps=False,
+                            cache_features=False, device='auto', compute_type='auto'):
+    """Transcribe a video file in chunks, writing each segment to disk as it is produced."""
     
-    if not WHISPER_AVAILABLE:
+    whisper_ok, _ = check_whisper()
+    if not whisper_ok:
         print("Error: faster-whisper not installed. Install with: pip install faster-whisper")
         return None
     
     # Initialize model
     try:
-        model = WhisperModel(model_size, device="cpu", compute_type="int8")
+        model = load_model(model_size, device, compute_type)
     except Exception as e:
         print(f"Error initializing Whisper model: {e}")
         return None
@@ -37,107 +51,155 @@ def transcribe_video_chunks(input_path, model_size='tiny', language=None, chunk_
     print("This approach processes the video in segments for better memory management...")
     
     try:
-        # Transcribe with timestamps
-        segments, info = model.transcribe(
-            str(input_path),
+        # Decoded audio does not depend on the model, so it can be reused across --model runs
+        audio = _load_or_decode_audio(input_path) if cache_features else str(input_path)
+        segments, info = iter_segments(
+            audio,
+            model,
             language=language,
-            beam_size=1,
-            vad_filter=True,
-            word_timestamps=True
+            batch_size=batch_size,
+            vad_threshold=vad_threshold,
+            min_silence_ms=min_silence_ms,
+            word_timestamps=word_timestamps
         )
         
-        # Collect segments and organize by time chunks
-        all_segments = []
-        current_chunk = 0
-        chunk_segments = []
-        
-        for segment in segments:
-            segment_data = {
-                'start': segment.start,
-                'end': segment.end,
-                'text': segment.text.strip(),
-                'chunk': int(segment.start // chunk_duration)
-            }
-            
-            # Add word-level timestamps if available
-            if hasattr(segment, 'words') and segment.words:
-                segment_data['words'] = [
-                    {
-                        'start': word.start,
-                        'end': word.end,
-                        'text': word.word.strip()
-                    }
-                    for word in segment.words if word.word
-                ]
-            
-            all_segments.append(segment_data)
-            chunk_segments.append(segment_data)
-            
-            # Print progress for each chunk
-            if segment_data['chunk'] > current_chunk:
-                current_chunk = segment_data['chunk']
-                print(f"Completed chunk {current_chunk} (up to {current_chunk * chunk_duration}s)")
-        
-        # Organize by chunks
-        chunks = {}
-        for segment in all_segments:
-            chunk_id = segment['chunk']
-            if chunk_id not in chunks:
-                chunks[chunk_id] = []
-            chunks[chunk_id].append(segment)
-        
-        transcript_data = {
-            'language': info.language,
-            'duration': info.duration,
-            'chunk_duration': chunk_duration,
-            'total_chunks': len(chunks),
-            'chunks': chunks,
-            'all_segments': all_segments
-        }
-        
-        return transcript_data
+        chunk_counts = _stream_segments(segments, output_dir, chunk_duration, total_duration=info.duration)
         
     except Exception as e:
         print(f"Error during transcription: {e}")
         return None
+    
+    transcript_data = {
+        'language': info.language,
+        'duration': info.duration,
+        'chunk_duration': chunk_duration,
+        'total_chunks': len(chunk_counts),
+        'total_segments': sum(chunk_counts.values()),
+        'chunks': chunk_counts
+    }
+    
+    # Save JSON summary; the segments themselves are in transcript_segments.jsonl
+    json_file = Path(output_dir) / "transcript_data.json"
+    if ORJSON_AVAILABLE:
+        json_file.write_bytes(orjson.dumps(transcript_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(transcript_data, f, indent=2, ensure_ascii=False)
+    
+    print(f"Chunked transcript saved to: {output_dir}")
+    print(f"Individual chunks: {len(chunk_counts)} files")
+    print(f"Combined transcript: {Path(output_dir) / 'full_transcript.txt'}")
+    
+    return transcript_data
+
+
+def _audio_cache_path(input_path):
+    """Cache file for input_path, keyed on its path, size and mtime so the video is not read to check it."""
+    st = os.stat(input_path)
+    raw = f"{os.path.abspath(input_path)}|{st.st_mtime_ns}|{st.st_size}"
+    return Path(AUDIO_CACHE_DIR) / f"{hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()}.npz"
 
 
-def save_chunked_transcript(transcript_data, output_dir):
-    """Save transcript organized by chunks."""
+def _load_or_decode_audio(input_path):
+    """
+    Return 16 kHz mono audio for input_path, decoding it only when AUDIO_CACHE_DIR
+    has no copy for this path, size and modification time.
+    """
+    import numpy as np
+    from faster_whisper.audio import decode_audio
+    
+    cache_path = _audio_cache_path(input_path)
+    
+    if cache_path.exists():
+        try:
+            with np.load(cache_path) as cached:
+                if int(cached['sampling_rate']) == AUDIO_SAMPLE_RATE:
+                    print(f"Using cached audio: {cache_path}")
+                    return cached['audio']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable audio cache {cache_path}: {e}")
+    
+    audio = decode_audio(str(input_path), sampling_rate=AUDIO_SAMPLE_RATE)
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, audio=audio, sampling_rate=AUDIO_SAMPLE_RATE)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: could not write audio cache {cache_path}: {e}")
+    return audio
+
+
+def _json_line(obj):
+    """Encode one JSON Lines record."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj) + b'\n'
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def _stream_segments(segments, output_dir, chunk_duration, total_duration=None):
+    """
+    Write segment dicts (from transcriber.iter_segments) to chunk_NNN.txt,
+    full_transcript.txt and transcript_segments.jsonl as they arrive, without
+    keeping the transcript in memory.
+    
+    Returns a dict mapping chunk id to its number of segments.
+    """
     output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True)
     
-    # Save individual chunk files
-    for chunk_id, segments in transcript_data['chunks'].items():
-        chunk_file = output_dir / f"chunk_{chunk_id:03d}.txt"
-        with open(chunk_file, 'w', encoding='utf-8') as f:
-            for segment in segments:
-                start_time = segment['start']
-                hours = int(start_time // 3600)
-                minutes = int((start_time % 3600) // 60)
-                seconds = int(start_time % 60)
-                timestamp = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                f.write(f"[{timestamp}] Speaker: {segment['text']}\n")
-    
-    # Save combined transcript
-    combined_file = output_dir / "full_transcript.txt"
-    with open(combined_file, 'w', encoding='utf-8') as f:
-        for segment in transcript_data['all_segments']:
-            start_time = segment['start']
-            hours = int(start_time // 3600)
-            minutes = int((start_time % 3600) // 60)
-            seconds = int(start_time % 60)
-            timestamp = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-            f.write(f"[{timestamp}] Speaker: {segment['text']}\n")
-    
-    # Save JSON data
-    json_file = output_dir / "transcript_data.json"
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(transcript_data, f, indent=2, ensure_ascii=False)
+    counts = {}
+    chunk_id = None
+    chunk_file = None
+    full_file = open(output_dir / "full_transcript.txt", 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+    json_file = open(output_dir / "transcript_segments.jsonl", 'wb', buffering=WRITE_BUFFER_SIZE)
+    # Progress in seconds of media transcribed, redrawn in place
+    progress = tqdm(total=total_duration, unit='s', desc='transcribe') if tqdm else None
+    try:
+        for segment_data in segments:
+            segment_data['chunk'] = int(segment_data['start'] // chunk_duration)
+            
+            # Segments arrive in time order, so only the current chunk file needs to be open
+            if segment_data['chunk'] != chunk_id:
+                if chunk_file:
+                    chunk_file.close()
+                chunk_id = segment_data['chunk']
+                mode = 'a' if chunk_id in counts else 'w'
+                chunk_file = open(output_dir / f"chunk_{chunk_id:03d}.txt", mode, encoding='utf-8',
+                                  buffering=WRITE_BUFFER_SIZE)
+            
+            line = f"[{_fmt_hms(segment_data['start'])}] Speaker: {segment_data['text']}\n"
+            chunk_file.write(line)
+            full_file.write(line)
+            json_file.write(_json_line(segment_data))
+            counts[chunk_id] = counts.get(chunk_id, 0) + 1
+            if progress is not None and segment_data['end'] > progress.n:
+                progress.update(segment_data['end'] - progress.n)
+    finally:
+        if progress is not None:
+            progress.close()
+        if chunk_file:
+            chunk_file.close()
+        full_file.close()
+        json_file.close()
     
-    print(f"Chunked transcript saved to: {output_dir}")
-    print(f"Individual chunks: {len(transcript_data['chunks'])} files")
-    print(f"Combined transcript: {combined_file}")
+    return counts
+
+
+def load_chunked_segments(output_dir):
+    """
+    Read transcript_segments.jsonl back as {chunk_id: [segments]}.
+    
+    The flat segment list is itertools.chain.from_iterable(chunks.values()).
+    """
+    chunks = {}
+    with open(Path(output_dir) / "transcript_segments.jsonl", 'rb') as f:
+        for line in f:
+            if line.strip():
+                segment = orjson.loads(line) if ORJSON_AVAILABLE else json.loads(line)
+                chunks.setdefault(segment['chunk'], []).append(segment)
+    return chunks
 
 
 def main():
@@ -170,6 +232,39 @@ Examples:
         help='Chunk duration in seconds (default: 300 = 5 minutes)'
     )
     
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=8,
+        help='Speech windows decoded per batch; 1 disables batching (default: 8)'
+    )
+    
+    parser.add_argument(
+        '--vad-threshold',
+        type=float,
+        default=0.5,
+        help='Speech probability threshold for voice activity detection (default: 0.5)'
+    )
+    
+    parser.add_argument(
+        '--min-silence-ms',
+        type=int,
+        default=500,
+        help='Minimum silence in milliseconds that splits speech (default: 500)'
+    )
+    
+    parser.add_argument(
+        '--word-timestamps',
+        action='store_true',
+        help='Include word-level timestamps (slower; off by default)'
+    )
+    
+    parser.add_argument(
+        '--cache-features',
+        action='store_true',
+        help='Cache the decoded audio in AUDIO_CACHE_DIR (default: ./cache/audio) for repeat runs'
+    )
+    
     parser.add_argument(
         '-m', '--model',
         choices=['tiny', 'base', 'small', 'medium', 'large'],
@@ -182,6 +277,20 @@ Examples:
         help='Language code (e.g., en, es, fr). Leave empty for auto-detection'
     )
     
+    parser.add_argument(
+        '-d', '--device',
+        choices=['auto', 'cpu', 'cuda'],
+        default='auto',
+        help='Device to use (default: auto, CUDA when available)'
+    )
+    
+    parser.add_argument(
+        '--compute-type',
+        choices=['auto', 'int8', 'int8_float16', 'float16', 'float32'],
+        default='auto',
+        help='Compute type (default: auto)'
+    )
+    
     args = parser.parse_args()
     
     # Validate input file
@@ -190,8 +299,9 @@ Examples:
         sys.exit(1)
     
     # Check if faster-whisper is available
-    if not WHISPER_AVAILABLE:
-        print("Error: faster-whisper is not installed.")
+    whisper_ok, whisper_error = check_whisper()
+    if not whisper_ok:
+        print(f"Error: faster-whisper is not installed ({whisper_error}).")
         print("Install it with: pip install faster-whisper")
         sys.exit(1)
     
@@ -200,22 +310,27 @@ Examples:
         args.input_video,
         model_size=args.model,
         language=args.language,
-        chunk_duration=args.chunk_duration
+        chunk_duration=args.chunk_duration,
+        output_dir=args.output_dir,
+        batch_size=args.batch_size,
+        vad_threshold=args.vad_threshold,
+        min_silence_ms=args.min_silence_ms,
+        word_timestamps=args.word_timestamps,
+        cache_features=args.cache_features,
+        device=args.device,
+        compute_type=args.compute_type
     )
     
     if transcript_data is None:
         print("Transcription failed.")
         sys.exit(1)
     
-    # Save chunked transcript
-    save_chunked_transcript(transcript_data, args.output_dir)
-    
     # Print summary
     print(f"\nTranscription Summary:")
     print(f"Language detected: {transcript_data['language']}")
     print(f"Duration: {transcript_data['duration']:.2f} seconds")
     print(f"Total chunks: {transcript_data['total_chunks']}")
-    print(f"Total segments: {len(transcript_data['all_segments'])}")
+    print(f"Total segments: {transcript_data['total_segments']}")
     
     # Suggest next step
     print(f"\nNext step: Generate meeting minutes with:")
@@ -16,25 +16,38 @@ import sys
 import argparse
 import json
 from pathlib import Path
-from datetime import datetime
+
+from transcriber import WRITE_BUFFER_SIZE, check_whisper, load_model, iter_segments, _fmt_hms
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 try:
-    from faster_whisper import WhisperModel
-    WHISPER_AVAILABLE = True
+    import numpy as np
+    NUMPY_AVAILABLE = True
 except ImportError:
-    WHISPER_AVAILABLE = False
+    NUMPY_AVAILABLE = False
+
+
+# One SubRip cue: index, start h/m/s/ms, end h/m/s/ms, text
+SRT_CUE = "{}\n{:02d}:{:02d}:{:02d},{:03d} --> {:02d}:{:02d}:{:02d},{:03d}\n{}\n\n"
 
 
-def transcribe_video(input_path, model_size='small', language=None, device='auto', compute_type='auto'):
+def transcribe_video(input_path, model_size='small', language=None, device='auto', compute_type='auto',
+                     vad_threshold=0.5, min_silence_ms=500, word_timestamps=False):
     """Transcribe a video file using faster-whisper."""
     
-    if not WHISPER_AVAILABLE:
+    whisper_ok, _ = check_whisper()
+    if not whisper_ok:
         print("Error: faster-whisper not installed. Install with: pip install faster-whisper")
         return None
     
     # Initialize model
     try:
-        model = WhisperModel(model_size, device=device, compute_type=compute_type)
+        model = load_model(model_size, device, compute_type)
     except Exception as e:
         print(f"Error initializing Whisper model: {e}")
         return None
@@ -43,44 +56,20 @@ def transcribe_video(input_path, model_size='small', language=None, device='auto
     print("This may take a few minutes depending on video length...")
     
     try:
-        # Transcribe with timestamps
-        segments, info = model.transcribe(
+        segments, info = iter_segments(
             str(input_path),
+            model,
             language=language,
-            beam_size=1,
-            vad_filter=True,
-            word_timestamps=True
+            vad_threshold=vad_threshold,
+            min_silence_ms=min_silence_ms,
+            word_timestamps=word_timestamps
         )
-        
-        # Collect segments
-        transcript_data = {
+        return {
             'language': info.language,
             'duration': info.duration,
-            'segments': []
+            'segments': list(segments)
         }
         
-        for segment in segments:
-            segment_data = {
-                'start': segment.start,
-                'end': segment.end,
-                'text': segment.text.strip()
-            }
-            
-            # Add word-level timestamps if available
-            if hasattr(segment, 'words') and segment.words:
-                segment_data['words'] = [
-                    {
-                        'start': word.start,
-                        'end': word.end,
-                        'text': word.word.strip()
-                    }
-                    for word in segment.words if word.word
-                ]
-            
-            transcript_data['segments'].append(segment_data)
-        
-        return transcript_data
-        
     except Exception as e:
         print(f"Error during transcription: {e}")
         return None
@@ -88,23 +77,12 @@ def transcribe_video(input_path, model_size='small', language=None, device='auto
 
 def format_transcript_for_meeting_minutes(transcript_data):
     """Format transcript data for the meeting minutes generator."""
-    lines = []
-    
-    for segment in transcript_data['segments']:
-        start_time = segment['start']
-        text = segment['text']
-        
-        # Format timestamp as HH:MM:SS
-        hours = int(start_time // 3600)
-        minutes = int((start_time % 3600) // 60)
-        seconds = int(start_time % 60)
-        timestamp = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-        
-        # For now, we'll use a generic speaker since we don't have speaker diarization
-        # The meeting minutes generator can try to identify speakers from the text
-        lines.append(f"[{timestamp}] Speaker: {text}")
-    
-    return '\n'.join(lines)
+    # For now, we'll use a generic speaker since we don't have speaker diarization
+    # The meeting minutes generator can try to identify speakers from the text
+    return '\n'.join(
+        f"[{_fmt_hms(segment['start'])}] Speaker: {segment['text']}"
+        for segment in transcript_data['segments']
+    )
 
 
 def save_transcript(transcript_data, output_path, format_type='txt'):
@@ -114,33 +92,46 @@ def save_transcript(transcript_data, output_path, format_type='txt'):
     if format_type == 'txt':
         # Format for meeting minutes generator
         formatted_text = format_transcript_for_meeting_minutes(transcript_data)
-        with open(output_path, 'w', encoding='utf-8') as f:
+        with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
             f.write(formatted_text)
     
     elif format_type == 'json':
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(transcript_data, f, indent=2, ensure_ascii=False)
+        if ORJSON_AVAILABLE:
+            output_path.write_bytes(orjson.dumps(transcript_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(transcript_data, f, indent=2, ensure_ascii=False)
     
     elif format_type == 'srt':
         # SubRip subtitle format
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for i, segment in enumerate(transcript_data['segments'], 1):
-                start_time = format_srt_time(segment['start'])
-                end_time = format_srt_time(segment['end'])
-                f.write(f"{i}\n")
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{segment['text']}\n\n")
+        with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            segments = transcript_data['segments']
+            starts = _split_timestamps(segment['start'] for segment in segments)
+            ends = _split_timestamps(segment['end'] for segment in segments)
+            f.writelines(
+                SRT_CUE.format(i, *start, *end, segment['text'])
+                for i, (segment, start, end) in enumerate(zip(segments, starts, ends), 1)
+            )
     
     print(f"Transcript saved to: {output_path}")
 
 
-def format_srt_time(seconds):
-    """Format time for SRT subtitle format."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millisecs = int((seconds % 1) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millisecs:03d}"
+def _split_timestamps(times):
+    """Split times in seconds into (hours, minutes, seconds, milliseconds) using integer math."""
+    if NUMPY_AVAILABLE:
+        ms = np.rint(np.fromiter(times, dtype=np.float64) * 1000).astype(np.int64)
+        hours, ms = np.divmod(ms, 3_600_000)
+        minutes, ms = np.divmod(ms, 60_000)
+        seconds, ms = np.divmod(ms, 1000)
+        return zip(hours.tolist(), minutes.tolist(), seconds.tolist(), ms.tolist())
+    
+    parts = []
+    for t in times:
+        hours, ms = divmod(int(round(t * 1000)), 3_600_000)
+        minutes, ms = divmod(ms, 60_000)
+        seconds, ms = divmod(ms, 1000)
+        parts.append((hours, minutes, seconds, ms))
+    return parts
 
 
 def main():
@@ -185,6 +176,26 @@ Examples:
         help='Language code (e.g., en, es, fr). Leave empty for auto-detection'
     )
     
+    parser.add_argument(
+        '--vad-threshold',
+        type=float,
+        default=0.5,
+        help='Speech probability threshold for voice activity detection (default: 0.5)'
+    )
+    
+    parser.add_argument(
+        '--min-silence-ms',
+        type=int,
+        default=500,
+        help='Minimum silence in milliseconds that splits speech (default: 500)'
+    )
+    
+    parser.add_argument(
+        '--word-timestamps',
+        action='store_true',
+        help='Include word-level timestamps (slower; off by default)'
+    )
+    
     parser.add_argument(
         '-d', '--device',
         choices=['auto', 'cpu', 'cuda'],
@@ -213,8 +224,9 @@ Examples:
         args.output = f"{base_name}_transcript.{args.format}"
     
     # Check if faster-whisper is available
-    if not WHISPER_AVAILABLE:
-        print("Error: faster-whisper is not installed.")
+    whisper_ok, whisper_error = check_whisper()
+    if not whisper_ok:
+        print(f"Error: faster-whisper is not installed ({whisper_error}).")
         print("Install it with: pip install faster-whisper")
         sys.exit(1)
     
@@ -224,7 +236,10 @@ Examples:
         model_size=args.model,
         language=args.language,
         device=args.device,
-        compute_type=args.compute_type
+        compute_type=args.compute_type,
+        vad_threshold=args.vad_threshold,
+        min_silence_ms=args.min_silence_ms,
+        word_timestamps=args.word_timestamps
     )
     
     if transcript_data is None:
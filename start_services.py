@@ -10,6 +10,9 @@ import time
 import subprocess
 import signal
 import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import os
 
@@ -17,9 +20,15 @@ import os
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Seconds a starting service gets to answer /health before we stop polling it
+STARTUP_GRACE_SEC = 10
+
 class ServiceManager:
     def __init__(self):
         self.processes = {}
+        self._http = None
+        self._http_lock = threading.Lock()
+        self.log_dir = Path("logs")
         self.services = {
             "transcription": {
                 "script": "services/transcription_service.py",
@@ -69,35 +78,96 @@ class ServiceManager:
         if service_name == "meeting_minutes" and api_key:
             cmd.extend(["--api-key", api_key])
         
+        # Give transcription all but two cores, leaving those to the lightweight services
+        env = None
+        transcription_cores = None
+        if service_name == "transcription":
+            transcription_cores = self._transcription_cores()
+            n = str(len(transcription_cores))
+            env = os.environ.copy()
+            env.setdefault("OMP_NUM_THREADS", n)
+            env.setdefault("MKL_NUM_THREADS", n)
+            cmd.extend(["--cpu-threads", n])
+        
         try:
             logger.info(f"Starting {service_name} service on port {service_config['port']}")
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            # Children write straight to their log file; nothing has to drain a pipe
+            self.log_dir.mkdir(exist_ok=True)
+            log_path = self.log_dir / f"{service_name}.log"
+            with open(log_path, "ab", buffering=0) as log_file:
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
+                    env=env
+                )
+            
+            # Pin right after spawn; CTranslate2's OpenMP threads start much later and inherit the mask.
+            # (preexec_fn is avoided: start_all_services calls this from several threads at once.)
+            if transcription_cores and hasattr(os, "sched_setaffinity"):
+                try:
+                    os.sched_setaffinity(process.pid, transcription_cores)
+                except OSError as e:
+                    logger.warning(f"Could not pin {service_name} service to cores: {e}")
             
             self.processes[service_name] = process
             logger.info(f"✅ {service_name} service started (PID: {process.pid})")
             
-            # Wait a moment for service to start
-            time.sleep(2)
-            
-            # Check if process is still running
-            if process.poll() is None:
+            # Wait until the service answers /health, or at least stays up for the grace period
+            if self._wait_ready(process, service_config["port"], deadline=time.time() + STARTUP_GRACE_SEC):
                 return True
             else:
-                stdout, stderr = process.communicate()
                 logger.error(f"❌ {service_name} service failed to start")
-                logger.error(f"STDOUT: {stdout}")
-                logger.error(f"STDERR: {stderr}")
+                logger.error(f"Last output ({log_path}):\n{self._tail_log(log_path)}")
                 return False
                 
         except Exception as e:
             logger.error(f"Failed to start {service_name} service: {e}")
             return False
     
+    def _transcription_cores(self):
+        """CPU cores reserved for the transcription service."""
+        if hasattr(os, "sched_getaffinity"):
+            available = sorted(os.sched_getaffinity(0))
+        else:
+            available = list(range(os.cpu_count() or 1))
+        return set(available[:max(1, len(available) - 2)])
+    
+    def _session(self):
+        """Keep-alive HTTP session shared by all health checks (created on first use)."""
+        with self._http_lock:
+            if self._http is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                self._http = requests.Session()
+                self._http.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0))
+            return self._http
+    
+    def _wait_ready(self, process, port: int, deadline: float) -> bool:
+        """Poll a starting service's health endpoint; False if the process exits first."""
+        import requests
+        
+        while time.time() < deadline:
+            if process.poll() is not None:
+                return False
+            try:
+                if self._session().get(f"http://localhost:{port}/health", timeout=0.2).status_code == 200:
+                    return True
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.1)
+        # Still loading (e.g. the Whisper model); wait_for_services covers the rest
+        return process.poll() is None
+    
+    def _tail_log(self, log_path: Path, lines: int = 50) -> str:
+        """Return the last lines of a service log."""
+        try:
+            with open(log_path, encoding="utf-8", errors="replace") as f:
+                return "".join(deque(f, maxlen=lines))
+        except OSError as e:
+            return f"<unable to read log: {e}>"
+    
     def stop_service(self, service_name: str):
         """Stop a specific service."""
         if service_name in self.processes:
@@ -118,9 +188,13 @@ class ServiceManager:
         """Start all services."""
         logger.info("🚀 Starting all microservices...")
         
+        # Start services concurrently so startup takes as long as the slowest one
+        with ThreadPoolExecutor(max_workers=len(self.services)) as executor:
+            results = list(executor.map(lambda name: self.start_service(name, api_key), self.services))
+        
         success_count = 0
-        for service_name in self.services:
-            if self.start_service(service_name, api_key):
+        for service_name, started in zip(self.services, results):
+            if started:
                 success_count += 1
             else:
                 logger.error(f"Failed to start {service_name} service")
@@ -152,7 +226,7 @@ class ServiceManager:
         
         for service_name, config in self.services.items():
             try:
-                response = requests.get(f"http://localhost:{config['port']}/health", timeout=5)
+                response = self._session().get(f"http://localhost:{config['port']}/health", timeout=5)
                 if response.status_code == 200:
                     health_data = response.json()
                     logger.info(f"✅ {service_name}: {health_data.get('status', 'unknown')}")
@@ -173,7 +247,7 @@ class ServiceManager:
             
             for service_name, config in self.services.items():
                 try:
-                    response = requests.get(f"http://localhost:{config['port']}/health", timeout=2)
+                    response = self._session().get(f"http://localhost:{config['port']}/health", timeout=2)
                     if response.status_code != 200:
                         all_ready = False
                         break
@@ -185,7 +259,7 @@ class ServiceManager:
                 logger.info("✅ All services are ready!")
                 return True
             
-            time.sleep(1)
+            time.sleep(0.1)
         
         logger.error("❌ Services not ready within timeout")
         return False
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Shared pytest fixtures.
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def _enable_db():
+    """Report SQLite as available to the API service for the whole session (opt in with usefixtures)."""
+    import services.api_service as api_module
+    old = api_module.DATABASE_AVAILABLE
+    api_module.DATABASE_AVAILABLE = True
+    yield
+    api_module.DATABASE_AVAILABLE = old
@@ -4,22 +4,56 @@ Tests for API service functionality.
 """
 
 import pytest
-import json
-from unittest.mock import patch, MagicMock
-from services.api_service import APIService, Meeting, Transcription, MeetingMinutes
+import orjson
+import sqlite3
+from dataclasses import replace
+from unittest.mock import patch
+
+# services.api_service (and Flask with it) is imported inside the fixtures and tests
+# that use it, so selecting other tests does not pay for it at collection time.
+pytestmark = pytest.mark.usefixtures("_enable_db")
 
 
 class TestAPIService:
     """Test cases for APIService."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def api_service(self):
-        """Create APIService instance for testing."""
-        with patch('services.api_service.DATABASE_AVAILABLE', True):
-            return APIService(db_path=":memory:")
+        """Create one APIService instance shared by all tests."""
+        from services.api_service import APIService
+        service = APIService(db_path=":memory:")
+        yield service
+        service.db.close()
+    
+    @pytest.fixture(scope="session", autouse=True)
+    def analyzed_db(self, api_service):
+        """Gather planner statistics once; APIService.db.close() runs PRAGMA optimize at teardown."""
+        api_service.db.conn.executescript("ANALYZE; PRAGMA optimize;")
+        return api_service
+    
+    @pytest.fixture(scope="session")
+    def empty_db(self, api_service, analyzed_db):
+        """Snapshot of the freshly created (empty, analyzed) schema."""
+        template = sqlite3.connect(":memory:")
+        api_service.db.conn.backup(template)
+        yield template
+        template.close()
+    
+    @pytest.fixture(scope="session")
+    def meeting_template(self):
+        """Meeting that tests copy with dataclasses.replace."""
+        from services.api_service import Meeting
+        return Meeting(id="", title="Test Meeting", date="2024-01-15", status="pending")
+    
+    @pytest.fixture(autouse=True)
+    def reset_db(self, api_service, empty_db):
+        """Restore the empty schema after each test."""
+        yield
+        empty_db.backup(api_service.db.conn)
     
     def test_create_meeting(self, api_service):
         """Test creating a meeting."""
+        from services.api_service import Meeting
         meeting_data = {
             "title": "Test Meeting",
             "date": "2024-01-15",
@@ -37,16 +71,10 @@ class TestAPIService:
         assert result.date == "2024-01-15"
         assert result.status == "pending"
     
-    def test_get_meeting(self, api_service):
+    def test_get_meeting(self, api_service, meeting_template):
         """Test retrieving a meeting."""
         # Create a meeting first
-        meeting = Meeting(
-            id="test-id",
-            title="Test Meeting",
-            date="2024-01-15",
-            status="pending"
-        )
-        api_service.db.create_meeting(meeting)
+        api_service.db.create_meeting(replace(meeting_template, id="test-id"))
         
         # Retrieve it
         retrieved = api_service.db.get_meeting("test-id")
@@ -55,17 +83,16 @@ class TestAPIService:
         assert retrieved.title == "Test Meeting"
         assert retrieved.id == "test-id"
     
-    def test_get_meetings_with_filters(self, api_service):
+    def test_get_meetings_with_filters(self, api_service, meeting_template):
         """Test retrieving meetings with filters."""
         # Create test meetings
         meetings = [
-            Meeting(id="1", title="Meeting 1", date="2024-01-15", status="completed"),
-            Meeting(id="2", title="Meeting 2", date="2024-01-16", status="pending"),
-            Meeting(id="3", title="Meeting 3", date="2024-01-17", status="completed"),
+            replace(meeting_template, id="1", title="Meeting 1", date="2024-01-15", status="completed"),
+            replace(meeting_template, id="2", title="Meeting 2", date="2024-01-16", status="pending"),
+            replace(meeting_template, id="3", title="Meeting 3", date="2024-01-17", status="completed"),
         ]
         
-        for meeting in meetings:
-            api_service.db.create_meeting(meeting)
+        api_service.db.create_meetings_bulk(meetings)
         
         # Test without filter
         all_meetings = api_service.db.get_meetings()
@@ -79,8 +106,20 @@ class TestAPIService:
         limited_meetings = api_service.db.get_meetings(limit=2)
         assert len(limited_meetings) == 2
     
-    def test_create_transcription(self, api_service):
+    def test_get_meetings_by_status_uses_index(self, api_service):
+        """Test that the status filter is served by an index rather than a table scan."""
+        plan = api_service.db.conn.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM meetings WHERE status = ? ORDER BY created_at DESC',
+            ("completed",)
+        ).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        assert "idx_meetings_status_created" in details
+        assert "TEMP B-TREE" not in details
+    
+    def test_create_transcription(self, api_service, meeting_template):
         """Test creating a transcription."""
+        from services.api_service import Transcription
+        api_service.db.create_meeting(replace(meeting_template, id="meeting-1"))
         transcription = Transcription(
             id="trans-1",
             meeting_id="meeting-1",
@@ -96,9 +135,22 @@ class TestAPIService:
         assert result.meeting_id == "meeting-1"
         assert result.text == "Test transcription text"
         assert result.duration == 120.5
+        
+        # Segments are stored as compact JSON and read back unchanged
+        stored = api_service.db.conn.execute(
+            "SELECT segments FROM transcriptions WHERE id = 'trans-1'"
+        ).fetchone()[0]
+        assert stored == '[{"start":0,"end":120.5,"text":"Test transcription text"}]'
+        assert api_service.db.get_transcription("trans-1").segments == transcription.segments
     
-    def test_create_meeting_minutes(self, api_service):
+    def test_create_meeting_minutes(self, api_service, meeting_template):
         """Test creating meeting minutes."""
+        from services.api_service import Transcription, MeetingMinutes
+        api_service.db.create_meeting(replace(meeting_template, id="meeting-1"))
+        api_service.db.create_transcription(
+            Transcription(id="trans-1", meeting_id="meeting-1", text="Test text", language="en",
+                          duration=60.0, segments=[])
+        )
         minutes = MeetingMinutes(
             id="minutes-1",
             meeting_id="meeting-1",
@@ -117,18 +169,10 @@ class TestAPIService:
         assert result.summary == "Test summary"
         assert len(result.speakers) == 2
     
-    def test_delete_meeting_cascade(self, api_service):
+    def test_delete_meeting_cascade(self, api_service, meeting_template):
         """Test that deleting a meeting cascades to related records."""
-        # Create meeting
-        meeting = Meeting(
-            id="meeting-1",
-            title="Test Meeting",
-            date="2024-01-15",
-            status="pending"
-        )
-        api_service.db.create_meeting(meeting)
-        
-        # Create related transcription
+        from services.api_service import Transcription, MeetingMinutes
+        # Create a meeting with related transcription and minutes
         transcription = Transcription(
             id="trans-1",
             meeting_id="meeting-1",
@@ -137,9 +181,6 @@ class TestAPIService:
             duration=60.0,
             segments=[]
         )
-        api_service.db.create_transcription(transcription)
-        
-        # Create related meeting minutes
         minutes = MeetingMinutes(
             id="minutes-1",
             meeting_id="meeting-1",
@@ -150,37 +191,57 @@ class TestAPIService:
             sprint_info={},
             speakers=[]
         )
-        api_service.db.create_meeting_minutes(minutes)
+        api_service.db.seed(
+            meetings=[replace(meeting_template, id="meeting-1")],
+            transcriptions=[transcription],
+            minutes=[minutes]
+        )
+        assert api_service.db.exists_meeting_minutes("minutes-1")
         
         # Delete meeting
         success = api_service.db.delete_meeting("meeting-1")
         assert success is True
         
         # Verify all related records are deleted
-        assert api_service.db.get_meeting("meeting-1") is None
-        assert api_service.db.get_transcription("trans-1") is None
-        assert api_service.db.get_meeting_minutes("minutes-1") is None
+        assert not api_service.db.exists_meeting("meeting-1")
+        assert not api_service.db.exists_transcription("trans-1")
+        assert not api_service.db.exists_meeting_minutes("minutes-1")
+    
+    def test_create_transcription_requires_meeting(self, api_service):
+        """Test that a transcription cannot reference a missing meeting."""
+        from services.api_service import Transcription
+        with pytest.raises(sqlite3.IntegrityError):
+            api_service.db.create_transcription(Transcription(
+                id="trans-1", meeting_id="missing", text="Test text", language="en",
+                duration=60.0, segments=[]
+            ))
+
+
+def post_json(client, url, obj):
+    """POST obj to url as an orjson-encoded JSON body."""
+    return client.post(url, data=orjson.dumps(obj), content_type='application/json')
 
 
 @pytest.mark.api
 class TestAPIServiceEndpoints:
     """Test API service endpoints."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def client(self):
-        """Create test client."""
-        with patch('services.api_service.FLASK_AVAILABLE', True):
-            from services.api_service import APIService
-            service = APIService(db_path=":memory:")
-            service.app.config['TESTING'] = True
-            return service.app.test_client()
+        """Create a test client for one app shared by the endpoint tests."""
+        import services.api_service as api_module
+        with patch.object(api_module, 'FLASK_AVAILABLE', new=True):
+            service = api_module.APIService(db_path=":memory:")
+        service.app.config.update(TESTING=True)
+        yield service.app.test_client()
+        service.db.close()
     
     def test_health_endpoint(self, client):
         """Test health check endpoint."""
         response = client.get('/health')
         assert response.status_code == 200
         
-        data = json.loads(response.data)
+        data = orjson.loads(response.data)
         assert data['status'] == 'healthy'
         assert data['service'] == 'api'
     
@@ -192,12 +253,10 @@ class TestAPIServiceEndpoints:
             "status": "pending"
         }
         
-        response = client.post('/api/meetings', 
-                             data=json.dumps(meeting_data),
-                             content_type='application/json')
+        response = post_json(client, '/api/meetings', meeting_data)
         
         assert response.status_code == 201
-        data = json.loads(response.data)
+        data = orjson.loads(response.data)
         assert data['success'] is True
         assert data['data']['title'] == "API Test Meeting"
     
@@ -206,7 +265,7 @@ class TestAPIServiceEndpoints:
         response = client.get('/api/meetings')
         assert response.status_code == 200
         
-        data = json.loads(response.data)
+        data = orjson.loads(response.data)
         assert data['success'] is True
         assert 'data' in data
         assert 'count' in data
@@ -216,7 +275,7 @@ class TestAPIServiceEndpoints:
         response = client.get('/api/stats')
         assert response.status_code == 200
         
-        data = json.loads(response.data)
+        data = orjson.loads(response.data)
         assert data['success'] is True
         assert 'data' in data
         assert 'total_meetings' in data['data']
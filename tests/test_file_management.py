@@ -3,33 +3,45 @@
 Tests for file management service functionality.
 """
 
+import io
+import zipfile
 import pytest
-import tempfile
-import shutil
 from pathlib import Path
-from services.file_management_service import FileManagementService
+
+
+class FakeZip:
+    """Stand-in for zipfile.ZipFile that records writes without compressing."""
+
+    def __init__(self, file, mode='r', compression=zipfile.ZIP_STORED):
+        self.written = []
+        FakeZip.last = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def write(self, filename, arcname=None):
+        self.written.append(str(arcname))
 
 
 class TestFileManagementService:
     """Test cases for FileManagementService."""
     
     @pytest.fixture
-    def temp_dirs(self):
+    def temp_dirs(self, tmp_path):
         """Create temporary directories for testing."""
-        temp_dir = tempfile.mkdtemp()
-        input_dir = Path(temp_dir) / "input"
-        output_dir = Path(temp_dir) / "output"
+        input_dir = tmp_path / "input"
+        output_dir = tmp_path / "output"
         input_dir.mkdir()
         output_dir.mkdir()
-        
-        yield input_dir, output_dir
-        
-        # Cleanup
-        shutil.rmtree(temp_dir)
+        return input_dir, output_dir
     
     @pytest.fixture
     def file_service(self, temp_dirs):
         """Create FileManagementService instance for testing."""
+        from services.file_management_service import FileManagementService
         input_dir, output_dir = temp_dirs
         return FileManagementService(
             base_output_dir=str(output_dir),
@@ -59,9 +71,7 @@ class TestFileManagementService:
         assert Path(result["file_path"]).exists()
         
         # Verify content
-        with open(result["file_path"], 'r') as f:
-            content = f.read()
-        assert content == transcript_text
+        assert Path(result["file_path"]).read_text(encoding="utf-8") == transcript_text
     
     def test_zip_output_folder(self, file_service):
         """Test creating ZIP archive of output folder."""
@@ -71,12 +81,30 @@ class TestFileManagementService:
         test_file = Path(output_folder) / "test.txt"
         test_file.write_text("Test content")
         
-        result = file_service.zip_output_folder(output_folder, "Test Meeting")
+        sink = io.BytesIO()
+        result = file_service.zip_output_folder(output_folder, "Test Meeting",
+                                                sink=sink, compression=zipfile.ZIP_STORED)
         
         assert result["success"] is True
-        assert result["zip_path"] is not None
-        assert Path(result["zip_path"]).exists()
+        assert result["zip_path"] is None
+        assert result["zip_size"] == sink.getbuffer().nbytes
         assert result["files_zipped"] > 0
+        with zipfile.ZipFile(sink) as archive:
+            assert archive.namelist() == ["test.txt"]
+    
+    def test_zip_output_folder_adds_each_file(self, file_service, monkeypatch):
+        """Test that every file in the folder is added under its relative path."""
+        monkeypatch.setattr(zipfile, "ZipFile", FakeZip)
+        output_folder = Path(file_service.create_dated_folder("Test Meeting"))
+        (output_folder / "transcript.txt").write_text("Transcript")
+        (output_folder / "nested").mkdir()
+        (output_folder / "nested" / "minutes.html").write_text("<p>Minutes</p>")
+        
+        result = file_service.zip_output_folder(str(output_folder), "Test Meeting", sink=io.BytesIO())
+        
+        assert result["success"] is True
+        assert result["files_zipped"] == 2
+        assert sorted(FakeZip.last.written) == [str(Path("nested") / "minutes.html"), "transcript.txt"]
     
     def test_delete_input_file_safety(self, file_service, temp_dirs):
         """Test that input file deletion only works on input directory files."""
@@ -100,6 +128,11 @@ class TestFileManagementService:
         assert result2["success"] is False
         assert "not in input directory" in result2["error"]
         assert outside_file.exists()  # File should still exist
+        
+        # Should fail for paths that only look like they are in the input directory
+        result3 = file_service.delete_input_file(str(input_dir / ".." / "output" / "important_file.txt"))
+        assert result3["success"] is False
+        assert outside_file.exists()
     
     def test_get_cleanup_status(self, file_service):
         """Test getting cleanup status information."""
@@ -113,19 +146,31 @@ class TestFileManagementService:
         assert status["cutoff_hours"] == 24
 
 
+@pytest.fixture(scope="class")
+def integration_dirs(tmp_path_factory):
+    """Create the input/output directories once for the integration test class."""
+    root = tmp_path_factory.mktemp("file_management")
+    input_dir = root / "input"
+    output_dir = root / "output"
+    input_dir.mkdir()
+    output_dir.mkdir()
+    return input_dir, output_dir
+
+
 @pytest.mark.integration
 class TestFileManagementIntegration:
     """Integration tests for file management."""
     
-    def test_complete_workflow(self, temp_dirs):
+    def test_complete_workflow(self, integration_dirs):
         """Test complete file management workflow."""
-        input_dir, output_dir = temp_dirs
+        input_dir, output_dir = integration_dirs
         
         # Create test video file
         video_file = input_dir / "test_meeting.mp4"
         video_file.write_text("fake video content")
         
         # Initialize service
+        from services.file_management_service import FileManagementService
         file_service = FileManagementService(
             base_output_dir=str(output_dir),
             input_dir=str(input_dir)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Tests for orchestrator service functionality.
+"""
+
+import json
+import threading
+import time
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+pytest.importorskip("flask")
+
+
+@pytest.fixture(scope="module")
+def orchestrator():
+    """Import the orchestrator module (and its global engine and app) only when a test needs it."""
+    import services.orchestrator_service as module
+    return module
+
+
+class TestOrchestratorEngine:
+    """Test cases for OrchestratorEngine."""
+
+    @pytest.fixture
+    def engine(self, orchestrator):
+        """Create OrchestratorEngine instance for testing."""
+        engine = orchestrator.OrchestratorEngine(
+            transcription_url="http://localhost:5001",
+            minutes_url="http://localhost:5002",
+            files_url="http://localhost:5003",
+            max_retries=0,
+            retry_backoff=0
+        )
+        yield engine
+        engine.shutdown(cancel_pending=True)
+
+    def test_copy_video_local(self, engine, tmp_path):
+        """Test that a local file service copies the video without HTTP."""
+        video_file = tmp_path / "meeting.mp4"
+        video_file.write_bytes(b"fake video content")
+        output_folder = tmp_path / "output"
+        output_folder.mkdir()
+
+        result = engine._copy_video(str(video_file), str(output_folder))
+
+        assert result["success"] is True
+        assert Path(result["file_path"]) == output_folder / "meeting.mp4"
+        assert Path(result["file_path"]).read_bytes() == b"fake video content"
+        assert result["file_size"] == len(b"fake video content")
+        assert video_file.exists()
+
+    def test_copy_video_remote_uses_http(self, orchestrator, tmp_path):
+        """Test that a remote file service copies the video over HTTP, not locally."""
+        engine = orchestrator.OrchestratorEngine(files_url="http://files.internal:5003")
+        assert engine._files_local is False
+        video_file = tmp_path / "meeting.mp4"
+        video_file.write_bytes(b"fake video content")
+        output_folder = tmp_path / "output"
+        posted = []
+
+        def post(url, payload, timeout, stream=False):
+            posted.append((url, payload))
+            return SimpleNamespace(status_code=200, content=b'{"success": true, "file_path": "/remote/meeting.mp4"}')
+
+        engine._post = post
+        result = engine._copy_video(str(video_file), str(output_folder))
+
+        assert result == {"success": True, "file_path": "/remote/meeting.mp4"}
+        assert posted == [("http://files.internal:5003/copy-video",
+                           {"video_path": str(video_file), "output_folder": str(output_folder)})]
+        assert not output_folder.exists()
+
+    def test_instance_to_dict_omits_step_details(self, orchestrator):
+        """Test that the API projection drops details of successful steps by default."""
+        instance = orchestrator.WorkflowInstance(
+            id="wf-1", status="running", input={"video_path": "missing.mp4"},
+            created_at="t0", updated_at="t0"
+        )
+        instance.steps.append(orchestrator.WorkflowStepResult(
+            step="transcription", success=True, started_at="t0", ended_at="t1",
+            duration_sec=1.0, details={"data": {"segments": [1, 2, 3]}}
+        ))
+        instance.steps.append(orchestrator.WorkflowStepResult(
+            step="format_transcript", success=False, started_at="t1", ended_at="t2",
+            duration_sec=0.5, error="boom"
+        ))
+
+        summary = instance.to_dict()
+        assert "details" not in summary["steps"][0]
+        assert summary["steps"][1]["error"] == "boom"
+        assert "details" in summary["steps"][1]
+
+        verbose = instance.to_dict(include_step_details=True)
+        assert verbose["steps"][0]["details"] == {"data": {"segments": [1, 2, 3]}}
+
+    def test_instances_across_shards(self, engine):
+        """Test that started workflows can be fetched and listed across shards."""
+        # Only the bookkeeping is under test; don't run the steps against real services
+        engine._run_instance = lambda instance: None
+        started = [
+            engine.start_workflow({"video_path": f"missing_{i}.mp4", "meeting_title": f"Meeting {i}"})
+            for i in range(40)
+        ]
+
+        for instance in started:
+            assert engine.get_instance(instance.id) is instance
+        assert engine.get_instance("unknown-id") is None
+
+        listed = engine.list_instances(limit=100)
+        assert {i.id for i in listed} == {i.id for i in started}
+        assert len(engine.list_instances(limit=5)) == 5
+
+    def test_shutdown_fails_escaped_and_pending_workflows(self, orchestrator):
+        """Test that shutdown settles every workflow, including ones that never ran."""
+        engine = orchestrator.OrchestratorEngine(max_retries=0, retry_backoff=0, max_concurrency=1)
+        release = threading.Event()
+
+        def run_instance(instance):
+            release.wait(5)
+            raise RuntimeError("worker crashed")
+
+        engine._run_instance = run_instance
+        running = engine.start_workflow({"video_path": "a.mp4", "meeting_title": "A"})
+        pending = engine.start_workflow({"video_path": "b.mp4", "meeting_title": "B"})
+
+        # Queued workflows are cancelled before the in-flight workflow is released
+        shutdown = threading.Thread(target=engine.shutdown, kwargs={"cancel_pending": True})
+        shutdown.start()
+        deadline = time.monotonic() + 5
+        while pending.status != "failed":
+            if time.monotonic() > deadline:
+                release.set()
+                pytest.fail("pending workflow was not failed by shutdown within 5s")
+            time.sleep(0.01)
+        release.set()
+        shutdown.join(5)
+
+        assert running.status == "failed"
+        assert running.error == "worker crashed"
+        assert pending.status == "failed"
+        assert pending.error == "cancelled before start"
+
+    def test_backoff_delay_is_exponential_and_capped(self, orchestrator):
+        """Test that retry delays grow exponentially with jitter up to max_backoff."""
+        engine = orchestrator.OrchestratorEngine(retry_backoff=2, max_backoff=10)
+
+        for attempt, base in [(1, 2), (2, 4), (3, 8), (4, 10), (10, 10)]:
+            delay = engine._backoff_delay(attempt)
+            assert base * 0.5 <= delay <= base
+
+        # Retries past the cap must not all wait exactly max_backoff
+        capped = [engine._backoff_delay(10) for _ in range(50)]
+        assert max(capped) - min(capped) > 1
+
+    def test_step_calls_send_pre_encoded_json(self, engine):
+        """Test that step callouts post pre-encoded JSON over the thread's session."""
+        sent = {}
+
+        class FakeSession:
+            def post(self, url, data=None, headers=None, timeout=None, stream=False):
+                sent.update(url=url, data=data, headers=headers)
+                return SimpleNamespace(status_code=200, content=b'{"success": true, "folder_path": "/out"}')
+
+        engine._local.session = FakeSession()
+        result = engine._create_folder("Weekly Sync", "2024-01-15")
+
+        assert result == {"success": True, "folder_path": "/out"}
+        assert sent["url"] == "http://localhost:5003/create-dated-folder"
+        assert sent["headers"] == {"Content-Type": "application/json"}
+        assert json.loads(sent["data"]) == {"meeting_title": "Weekly Sync", "meeting_date": "2024-01-15"}
+
+
+class TestOrchestratorAPI:
+    """Test cases for orchestrator REST endpoints."""
+
+    def test_health_reuses_recent_dependency_check(self, orchestrator, monkeypatch):
+        """Test that health probes within the TTL share one dependency check."""
+        pinged = []
+        monkeypatch.setattr(orchestrator, "_ping", lambda url: pinged.append(url) or {'ok': True})
+        monkeypatch.setattr(orchestrator, "_health_cache_ts", float('-inf'))
+        client = orchestrator.app.test_client()
+
+        first = client.get('/health').get_json()
+        second = client.get('/health').get_json()
+
+        assert first == second
+        assert first['dependencies']['transcription'] == {'ok': True}
+        assert len(pinged) == 3
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Tests for the simple chunked transcription script.
+"""
+
+from simple_chunk_transcribe import _stream_segments, load_chunked_segments
+
+
+class TestChunkedSegments:
+    """Test cases for the chunked segment files."""
+
+    def test_segments_round_trip_through_jsonl(self, tmp_path):
+        """Test that load_chunked_segments reads back what _stream_segments wrote, grouped by chunk."""
+        segments = [
+            {'start': 0.0, 'end': 4.0, 'text': 'Welcome everyone.'},
+            {'start': 12.5, 'end': 15.0, 'text': 'Sprint review.'},
+            {'start': 31.0, 'end': 33.5, 'text': 'Action items: ship it.'},
+        ]
+
+        counts = _stream_segments([dict(s) for s in segments], tmp_path, chunk_duration=30)
+        chunks = load_chunked_segments(tmp_path)
+
+        assert counts == {0: 2, 1: 1}
+        assert list(chunks) == [0, 1]
+        assert chunks[0] == [dict(s, chunk=0) for s in segments[:2]]
+        assert chunks[1] == [dict(segments[2], chunk=1)]
+        assert (tmp_path / "chunk_001.txt").read_text(encoding='utf-8') == \
+            "[00:00:31] Speaker: Action items: ship it.\n"
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Tests for the chunked transcription pipeline helpers.
+"""
+
+import pytest
+
+pytest.importorskip("faster_whisper")
+
+from transcribe import label_speakers
+
+
+class TestLabelSpeakers:
+    """Test cases for label_speakers."""
+
+    def test_overlapping_turns_label_segment_inside_earlier_turn(self):
+        """Test that a segment inside a long turn is labelled even when a shorter turn started after it."""
+        turns = [(0.0, 20.0, 'SPEAKER_00'), (5.0, 6.0, 'SPEAKER_01'), (30.0, 40.0, 'SPEAKER_02')]
+        turn_starts = [turn[0] for turn in turns]
+        segments = [
+            {'start': 5.2, 'end': 5.8, 'text': 'Overlap.'},
+            {'start': 10.0, 'end': 12.0, 'text': 'Long turn.'},
+            {'start': 22.0, 'end': 24.0, 'text': 'Gap.'},
+            {'start': 1.0, 'end': 3.0, 'text': 'Offset.'},
+        ]
+
+        label_speakers(segments[:3], turns, turn_starts)
+        label_speakers(segments[3:], turns, turn_starts, offset=30.0)
+
+        assert segments[0]['speaker'] == 'SPEAKER_01'
+        assert segments[1]['speaker'] == 'SPEAKER_00'
+        assert 'speaker' not in segments[2]
+        assert segments[3]['speaker'] == 'SPEAKER_02'
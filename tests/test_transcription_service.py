@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for transcription service functionality.
+"""
+
+import threading
+import pytest
+from collections import OrderedDict
+from types import SimpleNamespace
+
+
+class FakeWhisperModel:
+    """Minimal stand-in for faster_whisper.WhisperModel that counts calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, video_path, **kwargs):
+        self.calls += 1
+        segments = [SimpleNamespace(start=0.0, end=1.5, text=' Hello team. ', words=None)]
+        return iter(segments), SimpleNamespace(language='en', duration=1.5)
+
+
+class TestTranscriptionService:
+    """Test cases for TranscriptionService."""
+
+    @pytest.fixture
+    def transcription_service(self):
+        """Create TranscriptionService instance without loading a model."""
+        from services.transcription_service import TranscriptionService
+        service = TranscriptionService.__new__(TranscriptionService)
+        service.model_size = 'tiny'
+        service.device = 'cpu'
+        service.compute_type = 'int8'
+        service.cpu_threads = 1
+        service.num_workers = 1
+        service.cache_dir = None
+        service._memory_cache = OrderedDict()
+        service._cache_lock = threading.Lock()
+        service.model = None
+        return service
+
+    def test_format_transcript_for_meeting_minutes(self, transcription_service):
+        """Test formatting segments as timestamped speaker lines."""
+        transcript_data = {
+            'segments': [
+                {'start': 0.0, 'end': 4.2, 'text': 'Welcome everyone.'},
+                {'start': 65.9, 'end': 70.0, 'text': 'Sprint review.'},
+                {'start': 3725.4, 'end': 3730.0, 'text': 'Action items.'},
+            ]
+        }
+
+        formatted = transcription_service.format_transcript_for_meeting_minutes(transcript_data)
+
+        assert formatted.split('\n') == [
+            '[00:00:00] Speaker: Welcome everyone.',
+            '[00:01:05] Speaker: Sprint review.',
+            '[01:02:05] Speaker: Action items.',
+        ]
+
+    def test_format_transcript_empty(self, transcription_service):
+        """Test formatting a transcript with no segments."""
+        assert transcription_service.format_transcript_for_meeting_minutes({'segments': []}) == ''
+
+    def test_transcribe_video_uses_cache(self, transcription_service, tmp_path):
+        """Test that repeat transcriptions of an unchanged file skip the model."""
+        video_file = tmp_path / "meeting.mp4"
+        video_file.write_bytes(b"fake video content")
+        transcription_service.cache_dir = tmp_path / "cache"
+        transcription_service.model = FakeWhisperModel()
+
+        first = transcription_service.transcribe_video(str(video_file), word_timestamps=False)
+        second = transcription_service.transcribe_video(str(video_file), word_timestamps=False)
+
+        assert first["success"] is True
+        assert second["data"] == first["data"]
+        assert first["data"]["segments"][0]["text"] == "Hello team."
+        assert transcription_service.model.calls == 1
+
+        # A fresh in-memory cache still hits the on-disk entry
+        transcription_service._memory_cache.clear()
+        third = transcription_service.transcribe_video(str(video_file), word_timestamps=False)
+        assert third["data"] == first["data"]
+        assert transcription_service.model.calls == 1
+
+        # Different options are cached separately
+        transcription_service.transcribe_video(str(video_file), word_timestamps=True)
+        assert transcription_service.model.calls == 2
+
+    def test_iter_transcription_yields_header_then_segments(self, transcription_service, tmp_path):
+        """Test that streamed transcription yields a header followed by segments."""
+        video_file = tmp_path / "meeting.mp4"
+        video_file.write_bytes(b"fake video content")
+        transcription_service.model = FakeWhisperModel()
+
+        streamed = list(transcription_service.iter_transcription(str(video_file), word_timestamps=False))
+        assert streamed[0] == {'language': 'en', 'duration': 1.5}
+        assert streamed[1:] == [{'start': 0.0, 'end': 1.5, 'text': 'Hello team.'}]
+
+        # The completed stream populates the cache used by transcribe_video
+        result = transcription_service.transcribe_video(str(video_file), word_timestamps=False)
+        assert result["data"]["segments"] == streamed[1:]
+        assert transcription_service.model.calls == 1
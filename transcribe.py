@@ -14,6 +14,10 @@ Requirements:
 Usage:
     python transcribe.py --chunks-dir ./output/test1_chunks --model small --language en
 
+    # Keep models loaded between runs: start a daemon once, then send it jobs
+    python transcribe.py --serve
+    python transcribe.py --server --chunks-dir ./output/test1_chunks --model small
+
 Outputs (created alongside the chunks directory):
     ./output/test1_chunks/transcripts/
         chunk_001.txt, chunk_001.json, ...
@@ -26,19 +30,60 @@ Outputs (created alongside the chunks directory):
 import os
 import sys
 import argparse
+import hashlib
 import json
 import math
+import queue
+import threading
+import re
+import subprocess
+import tempfile
+from bisect import bisect_right
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
+from multiprocessing.connection import Client, Listener
 import shutil
 
+# Optional: psutil for the physical core count
+try:
+    import psutil
+except Exception:
+    psutil = None
+
+
+def physical_cores() -> int:
+    """Physical CPU cores; hyperthreads share execution units and add little to CTranslate2."""
+    return (psutil.cpu_count(logical=False) if psutil else None) or os.cpu_count() or 1
+
+
+# OpenMP reads this when CTranslate2 is loaded, so it must be set before importing faster-whisper
+os.environ.setdefault('OMP_NUM_THREADS', str(physical_cores()))
+
 # Transcription backend (local, fast, CPU/GPU):
 # faster-whisper will download models automatically on first use
 try:
     from faster_whisper import WhisperModel
+    from faster_whisper.audio import decode_audio
 except ImportError:
     print("Missing dependency: faster-whisper.\nPlease run: pip install faster-whisper")
     sys.exit(1)
+import numpy as np  # installed with faster-whisper
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    # faster-whisper < 1.1 has no batched pipeline
+    BatchedInferencePipeline = None
+from transcriber import _cpu_has_int8_dot_product, _select_compute_type
+
+# Optional: orjson for fast JSON output
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Optional: OpenAI for LLM refinement
 try:
@@ -55,6 +100,7 @@ try:
     from reportlab.lib.pagesizes import A4
     from reportlab.pdfgen import canvas
     from reportlab.lib.units import cm
+    from reportlab.lib.utils import simpleSplit
 except Exception:
     A4 = None
     canvas = None
@@ -68,6 +114,25 @@ except Exception:
 
 SUPPORTED_EXTS = {'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.mpg', '.mpeg'}
 
+# Whisper models consume 16 kHz mono audio
+AUDIO_SAMPLE_RATE = 16000
+
+# Model owned by this process when running as a ProcessPoolExecutor worker (set by init_worker)
+_WORKER_MODEL = None
+
+# Loaded models by name, each with the (name, device, compute_type) it was loaded for;
+# a --serve daemon holds at most one copy of each model
+_MODEL_CACHE = {}
+
+# Where a --serve daemon listens: a named pipe on Windows, a UNIX socket elsewhere
+SOCKET_FAMILY = 'AF_PIPE' if sys.platform == 'win32' else 'AF_UNIX'
+DEFAULT_SOCKET = (r'\\.\pipe\video-chunker-transcribe' if SOCKET_FAMILY == 'AF_PIPE'
+                  else os.path.join(tempfile.gettempdir(), 'video-chunker-transcribe.sock'))
+
+
+class JobError(Exception):
+    """A transcription job that cannot run; the message is shown to the user."""
+
 
 def ensure_ffmpeg_available() -> bool:
     """Return True if ffmpeg binary is available; attempt to auto-detect winget install if missing."""
@@ -92,28 +157,88 @@ def ensure_ffmpeg_available() -> bool:
     return False
 
 
+# Output folders that transcribe.py writes inside the chunks directory
+OUTPUT_SUBDIRS = frozenset({'transcripts', 'docs'})
+
+_DIGITS_RE = re.compile(r'(\d+)')
+
+
+def _natural_key(path: str):
+    """Sort key that orders chunk_2 before chunk_10."""
+    return [int(part) if part.isdigit() else part for part in _DIGITS_RE.split(path)]
+
+
 def find_chunks(chunks_dir: Path):
+    """Video files under chunks_dir in chunk order, skipping the transcripts/ and docs/ output folders."""
     files = []
-    for p in sorted(chunks_dir.rglob('*')):
-        if p.is_file() and p.suffix.lower() in SUPPORTED_EXTS:
-            files.append(p)
-    return files
+    stack = [str(chunks_dir)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in OUTPUT_SUBDIRS:
+                        stack.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTS and entry.is_file():
+                    files.append(entry.path)
+    files.sort(key=_natural_key)
+    return [Path(f) for f in files]
+
+
+def speech_clips(audio: np.ndarray, min_silence_ms: int = 500) -> list:
+    """Run Silero VAD over the whole audio once; returns (start_s, end_s) windows of at most 30 s.
+
+    Adjacent speech regions are merged into one window, as BatchedInferencePipeline does,
+    so each encoder pass covers up to 30 s of speech rather than a single utterance.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps, merge_segments
+    vad_options = VadOptions(min_silence_duration_ms=min_silence_ms, max_speech_duration_s=30)
+    windows = merge_segments(get_speech_timestamps(audio, vad_options), vad_options, AUDIO_SAMPLE_RATE)
+    return [(w['start'] / AUDIO_SAMPLE_RATE, w['end'] / AUDIO_SAMPLE_RATE) for w in windows]
 
 
-def transcribe_file(model: WhisperModel, filepath: Path, language: str = None, word_timestamps: bool = False):
+def transcribe_file(model: WhisperModel, filepath, language: str = None, word_timestamps: bool = False,
+                    batch_size: int = 1, beam_size: int = 1, clips: list = None):
+    """Transcribe a media file path or a decoded 16 kHz mono float32 array.
+
+    clips, from speech_clips(), restricts decoding to those speech regions instead of running VAD here.
+    """
+    audio = filepath if isinstance(filepath, np.ndarray) else decode_audio(str(filepath), sampling_rate=AUDIO_SAMPLE_RATE)
+    if clips is not None and not clips:
+        # VAD found no speech
+        return {'language': language, 'duration': len(audio) / AUDIO_SAMPLE_RATE, 'segments': []}
     segments_out = []
     # beam_size 1 greedily is fast; you can tune.
     # vad_filter helps cut silence.
+    # A single temperature skips the fallback ladder that re-decodes low-confidence
+    # segments at up to five more temperatures. Without that fallback, not conditioning
+    # on the previous text stops a repetition loop carrying into the next segments.
+    # log_prob_threshold keeps its default because no_speech_threshold only drops
+    # silent windows in combination with it.
     translate = False  # keep language as-is
     options = dict(
-        beam_size=1,
+        beam_size=beam_size,
         vad_filter=True,
         language=language,
         task='transcribe',
+        temperature=0.0,
+        condition_on_previous_text=False,
+        compression_ratio_threshold=None,
+        no_speech_threshold=0.6,
     )
     if word_timestamps:
         options["word_timestamps"] = True
-    segments, info = model.transcribe(str(filepath), **options)
+    if clips is not None:
+        # Speech regions are already known, so only they are decoded and VAD is not rerun
+        options["vad_filter"] = False
+        if batch_size > 1 and BatchedInferencePipeline is not None:
+            options["clip_timestamps"] = [{'start': start, 'end': end} for start, end in clips]
+        else:
+            options["clip_timestamps"] = [t for clip in clips for t in clip]
+    # The batched pipeline decodes the VAD speech windows of a chunk as padded batches
+    if batch_size > 1 and BatchedInferencePipeline is not None:
+        segments, info = BatchedInferencePipeline(model=model).transcribe(audio, batch_size=batch_size, **options)
+    else:
+        segments, info = model.transcribe(audio, **options)
     for seg in segments:
         item = {
             'start': seg.start,
@@ -121,13 +246,11 @@ def transcribe_file(model: WhisperModel, filepath: Path, language: str = None, w
             'text': seg.text.strip()
         }
         if word_timestamps and hasattr(seg, 'words') and seg.words:
-            item['words'] = [
-                {
-                    'start': w.start,
-                    'end': w.end,
-                    'text': (w.word or '').strip()
-                } for w in seg.words if w is not None
-            ]
+            # Parallel arrays instead of one dict per word; segment_for_json expands them on write
+            words = [w for w in seg.words if w is not None]
+            item['word_starts'] = np.fromiter((w.start for w in words), dtype=np.float64, count=len(words))
+            item['word_ends'] = np.fromiter((w.end for w in words), dtype=np.float64, count=len(words))
+            item['word_texts'] = [(w.word or '').strip() for w in words]
         segments_out.append(item)
     return {
         'language': info.language,
@@ -136,6 +259,231 @@ def transcribe_file(model: WhisperModel, filepath: Path, language: str = None, w
     }
 
 
+def load_whisper_model(model_name: str, device: str, compute_type: str, cpu_threads: int = 0, num_workers: int = 1):
+    """Create a WhisperModel, falling back through compute types the device supports.
+
+    cpu_threads=0 uses one thread per physical core; num_workers is how many transcribe
+    calls the model can run concurrently. Returns (model, compute_type); raises
+    RuntimeError if no compute type works. Models are cached per process, one per name:
+    the first load fixes cpu_threads and num_workers, and loading the name for another
+    device or compute type replaces the cached copy.
+    """
+    key = (model_name, device, compute_type)
+    cached = _MODEL_CACHE.get(model_name)
+    if cached is None or cached[0] != key:
+        # Drop the old copy before loading its replacement
+        _MODEL_CACHE.pop(model_name, None)
+        _MODEL_CACHE[model_name] = (key, _create_whisper_model(model_name, device, compute_type, cpu_threads, num_workers))
+    return _MODEL_CACHE[model_name][1]
+
+
+def _create_whisper_model(model_name: str, device: str, compute_type: str, cpu_threads: int, num_workers: int):
+    model_options = dict(cpu_threads=cpu_threads or physical_cores(), num_workers=num_workers)
+    try:
+        return WhisperModel(model_name, device=device, compute_type=compute_type, **model_options), compute_type
+    except ValueError:
+        pass
+    # Fallback chain for incompatibilities
+    if device == 'cuda':
+        fallback_order = ['int8_float16', 'float16', 'float32']
+    else:
+        fallback_order = ['int8', 'float32']
+    last_err = None
+    for ct in fallback_order:
+        try:
+            return WhisperModel(model_name, device=device, compute_type=ct, **model_options), ct
+        except Exception as e:
+            last_err = e
+    raise RuntimeError(last_err)
+
+
+def init_worker(model_name: str, device: str, compute_type: str, cpu_threads: int = 0, num_workers: int = 1):
+    """ProcessPoolExecutor initializer: load this worker's model once."""
+    global _WORKER_MODEL
+    _WORKER_MODEL, _ = load_whisper_model(model_name, device, compute_type, cpu_threads, num_workers)
+
+
+def _transcribe_worker(filepath: Path, language: str = None, word_timestamps: bool = False, batch_size: int = 1,
+                       beam_size: int = 1):
+    return transcribe_file(_WORKER_MODEL, filepath, language=language, word_timestamps=word_timestamps,
+                           batch_size=batch_size, beam_size=beam_size)
+
+
+def threads_per_model_worker(device: str, cpu_threads: int, num_workers: int) -> int:
+    """cpu_threads for a model with num_workers: each CTranslate2 worker runs that many threads, so on CPU they split the cores."""
+    if device == 'cuda' or num_workers <= 1:
+        return cpu_threads
+    return max(1, (cpu_threads or physical_cores()) // num_workers)
+
+
+def default_workers(device: str, n_chunks: int) -> int:
+    """Chunks transcribed at once: a few threads on one GPU model, or one process per ~4 CPU cores."""
+    if device == 'cuda':
+        workers = 2
+    else:
+        workers = physical_cores() // 4
+    return max(1, min(workers, n_chunks))
+
+
+def transcribe_chunks(chunk_files: list, model_name: str, device: str, compute_type: str,
+                      language: str = None, word_timestamps: bool = False, workers: int = 1, batch_size: int = 1,
+                      beam_size: int = 1, cpu_threads: int = 0, num_workers: int = 1, shared_model: bool = False):
+    """Transcribe chunk files up to `workers` at a time, yielding results in chunk order.
+
+    On CUDA, or with shared_model, all workers are threads sharing one cached model (CTranslate2
+    releases the GIL while decoding). Otherwise on CPU each worker is a process with its own
+    model and an equal share of the cpu_threads (default: all physical cores).
+    """
+    if device == 'cuda' or workers == 1 or shared_model:
+        # The shared model needs one CTranslate2 worker per thread to decode them concurrently
+        model_workers = max(num_workers, workers)
+        model, _ = load_whisper_model(model_name, device, compute_type,
+                                      threads_per_model_worker(device, cpu_threads, model_workers), model_workers)
+        transcribe = partial(transcribe_file, model, language=language, word_timestamps=word_timestamps,
+                             batch_size=batch_size, beam_size=beam_size)
+        if workers == 1:
+            yield from map(transcribe, chunk_files)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            yield from ex.map(transcribe, chunk_files)
+        return
+
+    threads_per_worker = max(1, (cpu_threads or physical_cores()) // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(model_name, device, compute_type, threads_per_worker, num_workers)) as ex:
+        yield from ex.map(partial(_transcribe_worker, language=language, word_timestamps=word_timestamps,
+                                  batch_size=batch_size, beam_size=beam_size), chunk_files)
+
+
+def probe_duration(filepath: Path) -> float:
+    """Container duration of a media file in seconds, via ffprobe."""
+    out = subprocess.run(
+        ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nw=1:nk=1', str(filepath)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(out.strip())
+
+
+def decode_concatenated(chunk_files: list) -> np.ndarray:
+    """Decode the chunks back to back as one 16 kHz mono float32 stream with a single ffmpeg process."""
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+        for path in chunk_files:
+            escaped = str(Path(path).resolve()).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+        list_path = f.name
+    try:
+        pcm = subprocess.run(
+            ['ffmpeg', '-nostdin', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', list_path,
+             '-vn', '-ac', '1', '-ar', str(AUDIO_SAMPLE_RATE), '-f', 'f32le', '-'],
+            capture_output=True, check=True
+        ).stdout
+    finally:
+        os.unlink(list_path)
+    return np.frombuffer(pcm, dtype=np.float32)
+
+
+def split_by_chunk(data: dict, offsets: list) -> list:
+    """Split a transcript of the concatenated chunks into per-chunk transcripts.
+
+    offsets holds the cumulative chunk start times plus the total duration; segments go to
+    the chunk they start in and their times become relative to that chunk, as when each
+    chunk is transcribed on its own.
+    """
+    n_chunks = len(offsets) - 1
+    per_chunk = [
+        {'language': data['language'], 'duration': offsets[i + 1] - offsets[i], 'segments': []}
+        for i in range(n_chunks)
+    ]
+    for seg in data['segments']:
+        ci = min(max(bisect_right(offsets, seg['start']) - 1, 0), n_chunks - 1)
+        shift = offsets[ci]
+        item = dict(seg, start=seg['start'] - shift, end=seg['end'] - shift)
+        if 'word_starts' in seg:
+            item['word_starts'] = seg['word_starts'] - shift
+            item['word_ends'] = seg['word_ends'] - shift
+        per_chunk[ci]['segments'].append(item)
+    return per_chunk
+
+
+def concatenated_stream(chunk_files: list):
+    """Decoded audio of all chunks back to back, plus cumulative chunk offsets (with the total duration last)."""
+    offsets = [0.0]
+    for path in chunk_files:
+        offsets.append(offsets[-1] + probe_duration(path))
+    return decode_concatenated(chunk_files), offsets
+
+
+def transcribe_single_pass(chunk_files: list, model: WhisperModel, language: str = None,
+                           word_timestamps: bool = False, batch_size: int = 1, beam_size: int = 1,
+                           stream: tuple = None) -> list:
+    """Transcribe all chunks as one stream, paying model setup, VAD and language detection once.
+
+    stream is an already decoded concatenated_stream(chunk_files) result.
+    """
+    audio, offsets = stream or concatenated_stream(chunk_files)
+    data = transcribe_file(model, audio, language=language, word_timestamps=word_timestamps,
+                           batch_size=batch_size, beam_size=beam_size, clips=speech_clips(audio))
+    return split_by_chunk(data, offsets)
+
+
+# Per-segment word timing arrays set by transcribe_file when word timestamps are on
+WORD_FIELDS = ('word_starts', 'word_ends', 'word_texts')
+
+
+def segment_for_json(seg: dict) -> dict:
+    """Segment with its word arrays expanded into the {'start', 'end', 'text'} dicts of the JSON output."""
+    if 'word_texts' not in seg:
+        return seg
+    out = {k: v for k, v in seg.items() if k not in WORD_FIELDS}
+    out['words'] = [
+        {'start': start, 'end': end, 'text': text}
+        for start, end, text in zip(seg['word_starts'].tolist(), seg['word_ends'].tolist(), seg['word_texts'])
+    ]
+    return out
+
+
+@lru_cache(maxsize=1)
+def load_diarization_pipeline(device: str = 'cpu'):
+    """Load the pyannote pipeline once per process; it pulls several hundred MB of weights."""
+    pipeline = DiarizationPipeline.from_pretrained('pyannote/speaker-diarization-3.1',
+                                                   use_auth_token=os.environ.get('HUGGINGFACE_TOKEN'))
+    if pipeline is None:
+        raise RuntimeError("could not load pyannote/speaker-diarization-3.1 (check HUGGINGFACE_TOKEN)")
+    if device == 'cuda':
+        import torch
+        pipeline.to(torch.device('cuda'))
+    return pipeline
+
+
+def diarize(audio: np.ndarray, device: str = 'cpu') -> list:
+    """Speaker turns of the whole stream as (start_s, end_s, speaker), sorted by start."""
+    import torch
+    waveform = torch.from_numpy(audio.copy()).unsqueeze(0)
+    annotation = load_diarization_pipeline(device)({'waveform': waveform, 'sample_rate': AUDIO_SAMPLE_RATE})
+    return sorted((turn.start, turn.end, speaker) for turn, _, speaker in annotation.itertracks(yield_label=True))
+
+
+def label_speakers(segments: list, turns: list, turn_starts: list, offset: float = 0.0):
+    """Set each segment's 'speaker' to the turn containing its midpoint; offset maps chunk times to stream times."""
+    for seg in segments:
+        mid = offset + (seg['start'] + seg['end']) / 2
+        # Turns can overlap, so an earlier, longer turn may cover mid when the last one to start before it does not
+        i = bisect_right(turn_starts, mid) - 1
+        while i >= 0 and turns[i][1] < mid:
+            i -= 1
+        if i >= 0:
+            seg['speaker'] = turns[i][2]
+
+
+def write_json(path: Path, obj):
+    """Write obj as indented UTF-8 JSON, with orjson when available."""
+    if ORJSON_AVAILABLE:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with path.open('w', encoding='utf-8') as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+
+
 def write_chunk_outputs(base_out: Path, chunk_index: int, data: dict):
     base_out.mkdir(parents=True, exist_ok=True)
     txt_path = base_out / f"chunk_{chunk_index:03d}.txt"
@@ -143,25 +491,45 @@ def write_chunk_outputs(base_out: Path, chunk_index: int, data: dict):
     # TXT
     with txt_path.open('w', encoding='utf-8') as f:
         for seg in data['segments']:
-            f.write(f"[{seg['start']:.2f}-{seg['end']:.2f}] {seg['text']}\n")
+            speaker = f"{seg['speaker']}: " if 'speaker' in seg else ''
+            f.write(f"[{seg['start']:.2f}-{seg['end']:.2f}] {speaker}{seg['text']}\n")
     # JSON
-    with json_path.open('w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_json(json_path, dict(data, segments=[segment_for_json(seg) for seg in data['segments']]))
+
+
+def chunk_writer(write_queue: queue.Queue, errors: list):
+    """Writer thread: drain (base_out, chunk_index, data) items until a None sentinel arrives."""
+    while True:
+        item = write_queue.get()
+        if item is None:
+            break
+        if errors:
+            continue  # keep draining so the producer never blocks on a full queue
+        try:
+            write_chunk_outputs(*item)
+        except Exception as e:
+            errors.append(e)
 
 
 def aggregate_transcripts(per_chunk_data: list):
+    # '\n'.join sizes and builds the text in one allocation; a StringIO buffer is no cheaper
     full_text_lines = []
     full_segments = []
     for ci, item in enumerate(per_chunk_data, start=1):
         for seg in item['segments']:
             full_text_lines.append(seg['text'])
-            full_segments.append({
+            entry = {
                 'chunk_index': ci,
                 'start': seg['start'],
                 'end': seg['end'],
                 'text': seg['text'],
-                'words': seg.get('words') if isinstance(seg, dict) else None,
-            })
+                'words': None,
+            }
+            if 'speaker' in seg:
+                entry['speaker'] = seg['speaker']
+            if 'word_texts' in seg:
+                entry.update((k, seg[k]) for k in WORD_FIELDS)
+            full_segments.append(entry)
     return '\n'.join(full_text_lines), full_segments
 
 
@@ -170,29 +538,41 @@ def write_aggregate_outputs(transcripts_dir: Path, full_text: str, full_segments
     json_path = transcripts_dir / 'full_transcript.json'
     with txt_path.open('w', encoding='utf-8') as f:
         f.write(full_text.strip() + '\n')
-    with json_path.open('w', encoding='utf-8') as f:
-        json.dump({'segments': full_segments}, f, ensure_ascii=False, indent=2)
+    write_json(json_path, {'segments': [segment_for_json(seg) for seg in full_segments]})
 
 
 # Simple rule-based Agile meeting minutes generator
 # If the transcript includes explicit markers (e.g., "Action:", "Decision:"), we pick them up.
 # Otherwise we provide generic sections with extracted key sentences (naive heuristics).
 
+# One case-insensitive pattern per category, matching the keywords anywhere in a sentence
+_ACTION_RE = re.compile(r'action|next step|follow up|assign', re.I)
+_DECISION_RE = re.compile(r'decided|decision|agree|approved', re.I)
+_RISK_RE = re.compile(r'risk|issue|concern|block', re.I)
+_BLOCKER_RE = re.compile(r'blocked|blocker|dependency', re.I)
+
+
+@lru_cache(maxsize=8)
+def _split_sentences(full_text: str) -> tuple:
+    # Naive split by period; cached so the minutes and the snapshot split the transcript once
+    return tuple(s.strip() for s in full_text.replace('\n', ' ').split('.') if s.strip())
+
+
 def extract_key_sentences(full_text: str, max_sentences: int = 10):
-    # Naive split by period; pick first N non-empty sentences as a simple snapshot
-    sentences = [s.strip() for s in full_text.replace('\n', ' ').split('.') if s.strip()]
-    return sentences[:max_sentences]
+    # Pick first N non-empty sentences as a simple snapshot
+    return list(_split_sentences(full_text)[:max_sentences])
 
 
-def generate_meeting_minutes(full_text: str, meeting_title: str, facilitator: str = 'N/A', attendees: str = 'N/A') -> str:
-    now = datetime.now().strftime('%Y-%m-%d %H:%M')
+def generate_meeting_minutes(full_text: str, meeting_title: str, facilitator: str = 'N/A', attendees: str = 'N/A',
+                             now: str = None) -> str:
+    now = now or datetime.now().strftime('%Y-%m-%d %H:%M')
     sentences = extract_key_sentences(full_text, max_sentences=12)
 
     # Heuristic extraction
-    action_items = [s for s in sentences if any(k in s.lower() for k in ['action', 'next step', 'follow up', 'assign'])]
-    decisions = [s for s in sentences if any(k in s.lower() for k in ['decided', 'decision', 'agree', 'approved'])]
-    risks = [s for s in sentences if any(k in s.lower() for k in ['risk', 'issue', 'concern', 'block'])]
-    blockers = [s for s in sentences if any(k in s.lower() for k in ['blocked', 'blocker', 'dependency'])]
+    action_items = [s for s in sentences if _ACTION_RE.search(s)]
+    decisions = [s for s in sentences if _DECISION_RE.search(s)]
+    risks = [s for s in sentences if _RISK_RE.search(s)]
+    blockers = [s for s in sentences if _BLOCKER_RE.search(s)]
 
     def section(label, items):
         if not items:
@@ -241,28 +621,31 @@ def generate_meeting_minutes(full_text: str, meeting_title: str, facilitator: st
 def paragraphs_from_segments(segments: list, max_gap_s: float = 3.0, max_len_chars: int = 600):
     """Group segments into paragraphs with start/end timestamps.
     - New paragraph if time gap between segments exceeds max_gap_s, or accumulating text exceeds max_len_chars.
+    Segment fields are gathered into parallel arrays so boundaries are found with array
+    searches; the Python loop runs once per paragraph rather than once per segment.
     """
+    n = len(segments)
+    if not n:
+        return []
+    texts = [seg['text'] for seg in segments]
+    starts = np.fromiter((seg['start'] for seg in segments), dtype=np.float64, count=n)
+    ends = np.fromiter((seg['end'] for seg in segments), dtype=np.float64, count=n)
+    # cum_len[i] is the text length of segments [0, i)
+    cum_len = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=n), out=cum_len[1:])
+    gap_breaks = np.flatnonzero(starts[1:] - ends[:-1] > max_gap_s) + 1
+
     paragraphs = []
-    cur = {"start": None, "end": None, "text": []}
-    prev_end = None
-    cur_len = 0
-    for seg in segments:
-        start = seg['start']
-        end = seg['end']
-        text = seg['text']
-        if cur["start"] is None:
-            cur["start"] = start
-        if prev_end is not None and (start - prev_end > max_gap_s or cur_len + len(text) > max_len_chars):
-            cur["end"] = prev_end
-            paragraphs.append({"start": cur["start"], "end": cur["end"], "text": " ".join(cur["text"]).strip()})
-            cur = {"start": start, "end": None, "text": []}
-            cur_len = 0
-        cur["text"].append(text)
-        cur_len += len(text)
-        prev_end = end
-    if cur["text"]:
-        cur["end"] = prev_end
-        paragraphs.append({"start": cur["start"], "end": cur["end"], "text": " ".join(cur["text"]).strip()})
+    first = 0
+    while first < n:
+        # Next silence gap, and the first later segment that would push the text over max_len_chars
+        k = np.searchsorted(gap_breaks, first, side='right')
+        gap_next = int(gap_breaks[k]) if k < len(gap_breaks) else n
+        len_next = max(int(np.searchsorted(cum_len, cum_len[first] + max_len_chars, side='right')) - 1, first + 1)
+        last = min(gap_next, len_next, n)
+        paragraphs.append({"start": segments[first]['start'], "end": segments[last - 1]['end'],
+                           "text": " ".join(texts[first:last]).strip()})
+        first = last
     return paragraphs
 
 
@@ -285,55 +668,111 @@ def export_pdf(path: Path, title: str, sections: list):
     c = canvas.Canvas(str(path), pagesize=A4)
     width, height = A4
     x_margin, y_margin = 2*cm, 2*cm
+    max_width = width - 2 * x_margin
+    line_height = 0.45*cm
     y = height - y_margin
     c.setFont("Helvetica-Bold", 16)
     c.drawString(x_margin, y, title)
     y -= 1.0*cm
-    c.setFont("Helvetica", 11)
     for sec_title, content in sections:
         c.setFont("Helvetica-Bold", 13)
         c.drawString(x_margin, y, sec_title)
         y -= 0.6*cm
-        c.setFont("Helvetica", 11)
-        for line in content.split('\n'):
+        # Wrap long lines to the page width, then emit each page's lines through one text object
+        lines = [part for line in content.split('\n')
+                 for part in (simpleSplit(line, "Helvetica", 11, max_width) or [''])]
+        while lines:
             if y < y_margin:
                 c.showPage()
                 y = height - y_margin
-                c.setFont("Helvetica", 11)
-            c.drawString(x_margin, y, line[:110])
-            y -= 0.45*cm
+            fit = int((y - y_margin) // line_height) + 1
+            text = c.beginText(x_margin, y)
+            text.setFont("Helvetica", 11)
+            text.setLeading(line_height)
+            text.textLines(lines[:fit], trim=0)
+            c.drawText(text)
+            y -= line_height * len(lines[:fit])
+            del lines[:fit]
         y -= 0.5*cm
     c.save()
     return True
 
 
-def maybe_llm_refine(minutes_md: str, snapshot_md: str, api_model: str = "gpt-4o-mini"):
+def _llm_cache_key(minutes_md: str, snapshot_md: str, api_model: str, generated_at: str = None) -> str:
+    # The generation time changes on every run, so it is left out of the key; any other dates stay in
+    content = f"{minutes_md}\0{snapshot_md}\0{api_model}"
+    if generated_at:
+        content = content.replace(generated_at, '\0')
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _load_llm_cache(cache_path: Path) -> dict:
+    try:
+        data = cache_path.read_bytes()
+        cache = orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def maybe_llm_refine(minutes_md: str, snapshot_md: str, api_model: str = "gpt-4o-mini", cache_path: Path = None,
+                     generated_at: str = None):
+    """Refine both documents with OpenAI, reusing earlier results for the same content from cache_path.
+
+    generated_at is the generation time written into the documents; a cached result gets it swapped in.
+    """
     if openai is None:
         return minutes_md, snapshot_md
     api_key = os.environ.get('OPENAI_API_KEY')
     if not api_key:
         return minutes_md, snapshot_md
+    cache = _load_llm_cache(cache_path) if cache_path else {}
+    key = _llm_cache_key(minutes_md, snapshot_md, api_model, generated_at)
+    entry = cache.get(key)
+    # Entries that are not what this function writes are treated as misses
+    if (isinstance(entry, dict) and all(isinstance(entry.get(k), str) for k in ('minutes', 'snapshot', 'generated_at'))
+            and entry['minutes'] and entry['snapshot']):
+        m1, m2 = entry['minutes'], entry['snapshot']
+        if generated_at and entry['generated_at']:
+            m1 = m1.replace(entry['generated_at'], generated_at)
+            m2 = m2.replace(entry['generated_at'], generated_at)
+        return m1, m2
     try:
-        openai.api_key = api_key
-        # Chat Completions API (new SDKs use client; keep it simple here)
-        prompt_minutes = (
-            "Refine the following Agile meeting minutes for clarity and concision, keeping structure intact.\n\n" + minutes_md
-        )
-        prompt_snapshot = (
-            "Refine the following transcript snapshot for clarity and concision.\n\n" + snapshot_md
+        client = openai.OpenAI(api_key=api_key)
+        # One request refines both documents; JSON mode keeps them separable
+        resp = client.chat.completions.create(
+            model=api_model,
+            messages=[
+                {"role": "system", "content": (
+                    "Refine the Agile meeting minutes for clarity and concision, keeping their structure intact, "
+                    "and refine the transcript snapshot for clarity and concision. Return a JSON object with two "
+                    "string fields: \"minutes\" (the refined minutes Markdown) and \"snapshot\" (the refined "
+                    "snapshot Markdown)."
+                )},
+                {"role": "user", "content": f"MINUTES:\n{minutes_md}\n\nSNAPSHOT:\n{snapshot_md}"},
+            ],
+            response_format={"type": "json_object"},
         )
-        # Use legacy-style API for simplicity
-        resp1 = openai.ChatCompletion.create(model=api_model, messages=[{"role": "user", "content": prompt_minutes}])
-        resp2 = openai.ChatCompletion.create(model=api_model, messages=[{"role": "user", "content": prompt_snapshot}])
-        m1 = resp1.choices[0].message["content"]
-        m2 = resp2.choices[0].message["content"]
-        return m1, m2
+        content = resp.choices[0].message.content
+        refined = orjson.loads(content) if ORJSON_AVAILABLE else json.loads(content)
+        m1 = refined.get('minutes')
+        m2 = refined.get('snapshot')
     except Exception:
         return minutes_md, snapshot_md
-
-
-def generate_snapshot(full_text: str, meeting_title: str) -> str:
-    now = datetime.now().strftime('%Y-%m-%d %H:%M')
+    if not (isinstance(m1, str) and m1 and isinstance(m2, str) and m2):
+        return (m1 if isinstance(m1, str) and m1 else minutes_md,
+                m2 if isinstance(m2, str) and m2 else snapshot_md)
+    if cache_path:
+        cache[key] = {'generated_at': generated_at or '', 'minutes': m1, 'snapshot': m2}
+        try:
+            write_json(cache_path, cache)
+        except OSError:
+            pass
+    return m1, m2
+
+
+def generate_snapshot(full_text: str, meeting_title: str, now: str = None) -> str:
+    now = now or datetime.now().strftime('%Y-%m-%d %H:%M')
     sentences = extract_key_sentences(full_text, max_sentences=8)
     preview = '\n'.join(f"- {s}" for s in sentences)
     words = len(full_text.split())
@@ -352,34 +791,48 @@ def generate_snapshot(full_text: str, meeting_title: str) -> str:
     return doc
 
 
-def main():
+def build_parser():
     parser = argparse.ArgumentParser(description="Transcribe video chunks and generate documents")
-    parser.add_argument('--chunks-dir', required=True, help='Path to chunks directory, e.g., ./output/test1_chunks')
+    parser.add_argument('--chunks-dir', help='Path to chunks directory, e.g., ./output/test1_chunks (required unless --serve)')
     parser.add_argument('--model', default='small', help='faster-whisper model size (tiny, base, small, medium, large)')
     parser.add_argument('--device', default='auto', choices=['auto', 'cpu', 'cuda'], help='Device to run on')
     parser.add_argument('--compute-type', default='auto', help='Compute type: auto (default), int8, int8_float16, float16, float32')
     parser.add_argument('--language', default=None, help='Language code, e.g., en, hi, etc. Leave None for auto')
     parser.add_argument('--word-timestamps', action='store_true', help='Include word-level timestamps in output')
+    parser.add_argument('--beam-size', type=int, default=1, help='Beam width; 1 is greedy decoding (default: 1)')
+    parser.add_argument('--batch-size', type=int, default=0, help='Speech windows decoded per batch; 1 disables batching (default: 16 on CUDA, 8 on CPU)')
+    parser.add_argument('--cpu-threads', type=int, default=0, help='CTranslate2 threads, split across CPU workers (default: physical cores)')
+    parser.add_argument('--num-workers', type=int, default=1, help='Concurrent transcribe calls per WhisperModel (default: 1)')
+    parser.add_argument('--single-pass', action='store_true', help='Decode all chunks as one audio stream and transcribe it once')
+    parser.add_argument('--workers', type=int, default=0, help='Chunks transcribed concurrently (default: auto, 2 on CUDA, 1 per 4 CPU cores)')
     parser.add_argument('--para-gap', type=float, default=3.0, help='Max gap (s) between segments before starting new paragraph')
     parser.add_argument('--para-max-chars', type=int, default=600, help='Max paragraph text length before splitting')
     parser.add_argument('--facilitator', default='N/A', help='Facilitator name for YAML header')
     parser.add_argument('--attendees', default='N/A', help='Comma-separated attendees for YAML header')
     parser.add_argument('--use-llm', action='store_true', help='Refine minutes and snapshot with OpenAI if OPENAI_API_KEY is set')
     parser.add_argument('--diarize', action='store_true', help='Attempt speaker diarization with pyannote (requires HF token)')
-    args = parser.parse_args()
+    parser.add_argument('--serve', action='store_true', help='Run as a daemon that keeps models loaded between jobs sent with --server')
+    parser.add_argument('--server', action='store_true', help='Send this job to a running --serve daemon instead of running it here')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help=f'Socket/pipe used by --serve and --server (default: {DEFAULT_SOCKET})')
+    return parser
+
 
+def run_job(args, shared_model: bool = False) -> dict:
+    """Transcribe one chunks directory and write its transcripts and documents; returns the output paths.
+
+    shared_model runs CPU workers as threads on the process-wide cached model instead of a
+    process pool that would load its own models for every job.
+    """
     chunks_dir = Path(args.chunks_dir).resolve()
     if not chunks_dir.exists():
-        print(f"Error: chunks directory not found: {chunks_dir}")
-        sys.exit(1)
+        raise JobError(f"chunks directory not found: {chunks_dir}")
 
     if not ensure_ffmpeg_available():
-        sys.exit(1)
+        raise JobError("FFmpeg is not available")
 
     chunk_files = find_chunks(chunks_dir)
     if not chunk_files:
-        print(f"No chunk files found under: {chunks_dir}")
-        sys.exit(1)
+        raise JobError(f"No chunk files found under: {chunks_dir}")
 
     # Outputs
     transcripts_dir = chunks_dir / 'transcripts'
@@ -387,47 +840,71 @@ def main():
     transcripts_dir.mkdir(parents=True, exist_ok=True)
     docs_dir.mkdir(parents=True, exist_ok=True)
 
-    # Initialize model
+    # Model settings
     device = None if args.device == 'auto' else args.device
     selected_device = device or 'cpu'
 
-    # Auto-select compute type if requested
+    # Auto-select compute type if requested: int8_float16 on CUDA, int8 on CPU
+    # (load_whisper_model falls back on mismatch)
     compute_type = args.compute_type
     if compute_type == 'auto':
-        if selected_device == 'cuda':
-            compute_type = 'float16'  # broadly supported on CUDA
-        else:
-            compute_type = 'int8'     # efficient on CPU
+        compute_type = _select_compute_type(selected_device)
+    if compute_type == 'int8' and selected_device == 'cpu' and not _cpu_has_int8_dot_product():
+        print("Note: no VNNI/dot-product instructions detected; int8 runs without that speedup")
 
-    # Try initialization with graceful fallbacks
+    workers = args.workers or default_workers(selected_device, len(chunk_files))
+    batch_size = args.batch_size or (16 if selected_device == 'cuda' else 8)
+
+    # Chunk files are written by a separate thread while the next chunk is transcribed
+    write_queue = queue.Queue(maxsize=4)
+    write_errors = []
+    writer = threading.Thread(target=chunk_writer, args=(write_queue, write_errors), daemon=True)
+    writer.start()
+
+    per_chunk_data = []
     try:
-        model = WhisperModel(args.model, device=selected_device, compute_type=compute_type)
-    except ValueError:
-        # Fallback chain for incompatibilities
-        fallback_order = []
-        if selected_device == 'cuda':
-            fallback_order = ['float16', 'int8_float16', 'float32']
-        else:
-            fallback_order = ['int8', 'float32']
-        last_err = None
-        for ct in fallback_order:
+        # Diarization and single-pass decoding both work on the whole stream, decoded once here
+        diarize_stream = args.diarize and DiarizationPipeline is not None
+        if args.diarize and not diarize_stream:
+            print("Diarization skipped: pyannote.audio is not installed")
+        stream = concatenated_stream(chunk_files) if args.single_pass or diarize_stream else None
+        turns = None
+        if diarize_stream:
+            print("Diarizing speakers...")
             try:
-                model = WhisperModel(args.model, device=selected_device, compute_type=ct)
-                compute_type = ct
-                break
+                turns = diarize(stream[0], selected_device)
+                turn_starts = [turn[0] for turn in turns]
             except Exception as e:
-                last_err = e
-                continue
+                print(f"Diarization failed, continuing without speaker labels: {e}")
+
+        if args.single_pass:
+            print(f"Transcribing {len(chunk_files)} chunks as one stream on {selected_device}")
+            model, _ = load_whisper_model(args.model, selected_device, compute_type,
+                                          threads_per_model_worker(selected_device, args.cpu_threads, args.num_workers),
+                                          args.num_workers)
+            results = transcribe_single_pass(chunk_files, model, language=args.language,
+                                             word_timestamps=args.word_timestamps, batch_size=batch_size,
+                                             beam_size=args.beam_size, stream=stream)
         else:
-            print(f"Failed to initialize WhisperModel with compatible compute type. Last error: {last_err}")
-            sys.exit(1)
-
-    per_chunk_data = []
-    for idx, file in enumerate(chunk_files, start=1):
-        print(f"Transcribing chunk {idx}/{len(chunk_files)}: {file.name}")
-        data = transcribe_file(model, file, language=args.language, word_timestamps=args.word_timestamps)
-        per_chunk_data.append(data)
-        write_chunk_outputs(transcripts_dir, idx, data)
+            print(f"Transcribing {len(chunk_files)} chunks with {workers} worker(s) on {selected_device}")
+            results = transcribe_chunks(chunk_files, args.model, selected_device, compute_type,
+                                        language=args.language, word_timestamps=args.word_timestamps,
+                                        workers=workers, batch_size=batch_size, beam_size=args.beam_size,
+                                        cpu_threads=args.cpu_threads, num_workers=args.num_workers,
+                                        shared_model=shared_model)
+        for idx, data in enumerate(results, start=1):
+            print(f"Transcribed chunk {idx}/{len(chunk_files)}: {chunk_files[idx - 1].name}")
+            if turns:
+                label_speakers(data['segments'], turns, turn_starts, offset=stream[1][idx - 1])
+            per_chunk_data.append(data)
+            write_queue.put((transcripts_dir, idx, data))
+    except (RuntimeError, BrokenProcessPool, subprocess.CalledProcessError) as e:
+        raise JobError(f"Transcription failed: {e}") from e
+    finally:
+        write_queue.put(None)
+        writer.join()
+    if write_errors:
+        raise JobError(f"Failed to write chunk transcripts: {write_errors[0]}")
 
     # Aggregate
     full_text, full_segments = aggregate_transcripts(per_chunk_data)
@@ -441,12 +918,16 @@ def main():
 
     # Docs
     meeting_title = chunks_dir.name.replace('_', ' ')
-    minutes_md = generate_meeting_minutes(full_text, meeting_title, facilitator=args.facilitator, attendees=args.attendees)
-    snapshot_md = generate_snapshot(full_text, meeting_title) + "\n\n## Paragraph Overview (first 20)\n" + para_overview
+    generated_at = datetime.now().strftime('%Y-%m-%d %H:%M')
+    minutes_md = generate_meeting_minutes(full_text, meeting_title, facilitator=args.facilitator, attendees=args.attendees,
+                                          now=generated_at)
+    snapshot_md = (generate_snapshot(full_text, meeting_title, now=generated_at)
+                   + "\n\n## Paragraph Overview (first 20)\n" + para_overview)
 
     # Optional LLM refinement
     if args.use_llm:
-        minutes_md, snapshot_md = maybe_llm_refine(minutes_md, snapshot_md)
+        minutes_md, snapshot_md = maybe_llm_refine(minutes_md, snapshot_md, cache_path=docs_dir / '.llm_cache.json',
+                                                   generated_at=generated_at)
 
     (docs_dir / 'meeting_minutes.md').write_text(minutes_md, encoding='utf-8')
     (docs_dir / 'transcript_snapshot.md').write_text(snapshot_md, encoding='utf-8')
@@ -457,10 +938,83 @@ def main():
     export_pdf(docs_dir / 'meeting_minutes.pdf', meeting_title + ' - Minutes', [("Meeting Minutes", minutes_md)])
     export_pdf(docs_dir / 'transcript_snapshot.pdf', meeting_title + ' - Snapshot', [("Transcript Snapshot", snapshot_md)])
 
+    return {
+        'transcripts_dir': str(transcripts_dir),
+        'full_transcript': str(transcripts_dir / 'full_transcript.txt'),
+        'docs_dir': str(docs_dir),
+    }
+
+
+def serve(parser, args):
+    """Run jobs received on a local socket/pipe one at a time, keeping loaded models between jobs.
+
+    Requests and replies are JSON objects; a request holds the job's CLI options by dest name.
+    Worker and thread counts come from the daemon's own options, so every job reuses the same model.
+    """
+    address = args.socket
+    defaults = vars(parser.parse_args([]))
+    device = 'cuda' if args.device == 'cuda' else 'cpu'
+    workers = args.workers or default_workers(device, sys.maxsize)
+    pinned = {'workers': workers, 'num_workers': max(args.num_workers, workers), 'cpu_threads': args.cpu_threads}
+    if SOCKET_FAMILY == 'AF_UNIX' and os.path.exists(address):
+        os.unlink(address)  # stale socket from a previous daemon
+    with Listener(address, family=SOCKET_FAMILY) as listener:
+        if SOCKET_FAMILY == 'AF_UNIX':
+            os.chmod(address, 0o600)
+        print(f"Serving transcription jobs on {address} (Ctrl+C to stop)")
+        while True:
+            with listener.accept() as conn:
+                try:
+                    request = json.loads(conn.recv_bytes())
+                    job = argparse.Namespace(**{**defaults, **request, **pinned, 'serve': False, 'server': False})
+                    print(f"\nJob: {job.chunks_dir}")
+                    # Jobs reuse the models this daemon already holds rather than spawning worker processes
+                    reply = {'ok': True, **run_job(job, shared_model=True)}
+                except Exception as e:
+                    print(f"Job failed: {e}")
+                    reply = {'ok': False, 'error': str(e)}
+                conn.send_bytes(json.dumps(reply).encode('utf-8'))
+
+
+def submit_job(args) -> dict:
+    """Send a job to a --serve daemon and wait for its output paths."""
+    request = {k: v for k, v in vars(args).items() if k not in ('serve', 'server', 'socket')}
+    request['chunks_dir'] = str(Path(args.chunks_dir).resolve())
+    try:
+        with Client(args.socket, family=SOCKET_FAMILY) as conn:
+            conn.send_bytes(json.dumps(request).encode('utf-8'))
+            reply = json.loads(conn.recv_bytes())
+    except OSError as e:
+        raise JobError(f"no transcription daemon at {args.socket} ({e}); start one with --serve")
+    if not reply.pop('ok'):
+        raise JobError(reply['error'])
+    return reply
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if args.serve:
+        try:
+            serve(parser, args)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if not args.chunks_dir:
+        parser.error('--chunks-dir is required unless --serve is given')
+
+    try:
+        result = submit_job(args) if args.server else run_job(args)
+    except JobError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
     print("\nTranscription complete.")
-    print(f"Per-chunk transcripts: {transcripts_dir}")
-    print(f"Full transcript: {transcripts_dir / 'full_transcript.txt'}")
-    print(f"Documents: {docs_dir}")
+    print(f"Per-chunk transcripts: {result['transcripts_dir']}")
+    print(f"Full transcript: {result['full_transcript']}")
+    print(f"Documents: {result['docs_dir']}")
 
 
 if __name__ == '__main__':
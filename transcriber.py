@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Shared faster-whisper helpers for the simple transcription scripts.
+Both simple_transcribe.py and simple_chunk_transcribe.py load models and
+turn segments into dicts through this module, so a process that uses both
+loads each model once.
+"""
+
+import os
+
+
+# Large write buffers so transcript files are flushed in few big writes
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Whisper models consume 16 kHz mono audio
+AUDIO_SAMPLE_RATE = 16000
+
+# Loaded models keyed by (model_size, device, compute_type), reused across calls in this process
+_MODEL_CACHE = {}
+
+
+def check_whisper():
+    """Import faster-whisper on first use; returns (ok, error)."""
+    try:
+        import faster_whisper  # noqa: F401  (loads CTranslate2)
+    except ImportError as e:
+        return False, str(e)
+    return True, None
+
+
+def _cpu_has_int8_dot_product():
+    """Check /proc/cpuinfo for int8 dot-product instructions (x86 VNNI, ARM asimddp)."""
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith(('flags', 'Features')):
+                    flags = set(line.split(':', 1)[1].split())
+                    return bool(flags & {'avx512_vnni', 'avx_vnni', 'asimddp'})
+    except OSError:
+        pass
+    return False
+
+
+def _select_compute_type(device):
+    """Pick a compute type for the device: int8_float16 on CUDA, int8 on CPU.
+
+    int8 is the fastest CPU type CTranslate2 supports everywhere; _cpu_has_int8_dot_product()
+    only reports whether the CPU also has the VNNI/dot-product speedup.
+    """
+    return 'int8_float16' if device == 'cuda' else 'int8'
+
+
+def _pick_device():
+    """Return (device, compute_type): CUDA when CTranslate2 sees a GPU, else CPU."""
+    try:
+        import ctranslate2
+        device = 'cuda' if ctranslate2.get_cuda_device_count() > 0 else 'cpu'
+    except (ImportError, RuntimeError):
+        device = 'cpu'
+    return device, _select_compute_type(device)
+
+
+def load_model(model_size, device='auto', compute_type='auto'):
+    """Return a cached WhisperModel, resolving 'auto' device/compute type and loading it on first use."""
+    if device == 'auto':
+        device, default_compute_type = _pick_device()
+    else:
+        default_compute_type = _select_compute_type(device)
+    if compute_type == 'auto':
+        compute_type = default_compute_type
+
+    key = (model_size, device, compute_type)
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        from faster_whisper import WhisperModel
+        model = WhisperModel(
+            model_size,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=os.cpu_count() or 0
+        )
+        _MODEL_CACHE[key] = model
+    return model
+
+
+def _fmt_hms(t):
+    """Format seconds as HH:MM:SS."""
+    m, s = divmod(int(t), 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+
+def vad_parameters(threshold, min_silence_ms):
+    """Silero VAD options; silence removed here is never run through the encoder."""
+    return dict(threshold=threshold, min_silence_duration_ms=min_silence_ms, speech_pad_ms=200)
+
+
+def segment_to_dict(segment, word_timestamps=False):
+    """Convert a faster-whisper segment to a plain dict."""
+    segment_data = {
+        'start': segment.start,
+        'end': segment.end,
+        'text': segment.text.strip()
+    }
+
+    # Add word-level timestamps only when requested and available
+    if word_timestamps and segment.words:
+        segment_data['words'] = [
+            {
+                'start': word.start,
+                'end': word.end,
+                'text': word.word.strip()
+            }
+            for word in segment.words if word.word
+        ]
+
+    return segment_data
+
+
+def iter_segments(audio, model, language=None, batch_size=1, vad_threshold=0.5, min_silence_ms=500,
+                  word_timestamps=False):
+    """
+    Transcribe a file path or decoded audio array.
+
+    Returns (segments, info) like WhisperModel.transcribe, except that segments
+    lazily yields plain dicts.
+    """
+    # Transcribe with timestamps; the batched pipeline encodes several speech windows per call
+    transcribe_options = dict(
+        language=language,
+        beam_size=1,
+        vad_filter=True,
+        vad_parameters=vad_parameters(vad_threshold, min_silence_ms),
+        word_timestamps=word_timestamps
+    )
+
+    try:
+        from faster_whisper import BatchedInferencePipeline
+    except ImportError:
+        # faster-whisper < 1.1 has no batched pipeline
+        BatchedInferencePipeline = None
+    if batch_size > 1 and BatchedInferencePipeline is not None:
+        pipeline = BatchedInferencePipeline(model=model)
+        segments, info = pipeline.transcribe(audio, batch_size=batch_size, **transcribe_options)
+    else:
+        segments, info = model.transcribe(audio, **transcribe_options)
+
+    return (segment_to_dict(segment, word_timestamps) for segment in segments), info
@@ -171,43 +171,50 @@ def split_video(chunk_duration=60, chunks_per_folder=10):
     
     # Calculate number of chunks
     total_chunks = math.ceil(duration / chunk_duration)
-    print(f"Total chunks to create: {total_chunks}")
-    
-    # Create folder structure
-    folders = create_output_folders(output_path, total_chunks, chunks_per_folder)
-    print(f"Created {len(folders)} folders for organization")
+    print(f"Expected chunks: {total_chunks}")
     
     # Get input file info
     input_name = Path(input_path).stem
     input_ext = Path(input_path).suffix
+    chunk_pattern = f"{input_name}_chunk_%03d{input_ext}"
     
-    # Split video into chunks
-    for i in range(total_chunks):
-        start_time = i * chunk_duration
-        
-        # Determine which folder this chunk belongs to
-        folder_index = i // chunks_per_folder
-        current_folder = folders[folder_index]
-        
-        # Create output filename
-        chunk_filename = f"{input_name}_chunk_{i+1:03d}{input_ext}"
-        output_file = os.path.join(current_folder, chunk_filename)
-        
-        try:
-            print(f"Creating chunk {i+1}/{total_chunks}: {chunk_filename}")
-            
-            # Use ffmpeg to extract the chunk
-            (
-                ffmpeg
-                .input(input_path, ss=start_time, t=chunk_duration)
-                .output(output_file, c='copy')  # Copy without re-encoding for speed
-                .overwrite_output()
-                .run(quiet=True)
+    # Split the whole video in one ffmpeg pass with the segment muxer.
+    # Cuts land on keyframes, so chunk lengths (and count) can differ slightly from chunk_duration.
+    try:
+        print(f"Splitting into {chunk_duration}s chunks...")
+        (
+            ffmpeg
+            .input(input_path)
+            .output(
+                os.path.join(output_path, chunk_pattern),
+                c='copy',  # Copy without re-encoding for speed
+                f='segment',
+                segment_time=chunk_duration,
+                segment_start_number=1,
+                reset_timestamps=1
             )
-            
-        except ffmpeg.Error as e:
-            print(f"Error creating chunk {i+1}: {e}")
-            continue
+            .overwrite_output()
+            .run(quiet=True)
+        )
+    except ffmpeg.Error as e:
+        print(f"Error splitting video: {e}")
+        return False
+    
+    # Same prefix and suffix, so sorting by length first keeps chunk_1000 after chunk_999
+    chunk_files = sorted(
+        (f for f in os.listdir(output_path)
+         if f.startswith(f"{input_name}_chunk_") and f.endswith(input_ext)),
+        key=lambda f: (len(f), f)
+    )
+    total_chunks = len(chunk_files)
+    
+    # Create folder structure and move each chunk into its folder
+    folders = create_output_folders(output_path, total_chunks, chunks_per_folder)
+    print(f"Created {len(folders)} folders for organization")
+    
+    for i, chunk_filename in enumerate(chunk_files):
+        current_folder = folders[i // chunks_per_folder]
+        os.replace(os.path.join(output_path, chunk_filename), os.path.join(current_folder, chunk_filename))
     
     print(f"\nVideo splitting complete!")
     print(f"Output location: {output_path}")